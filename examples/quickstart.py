@@ -4,7 +4,7 @@ Demonstrates the core capabilities of the agent planning framework:
   1. Build a plan manually with PlanBuilder and add steps with dependencies
   2. Validate a plan and inspect the results
   3. Compute parallel execution waves with PlanOptimizer
-  4. Find the critical path with DependencyResolver
+  4. Find the critical path from the same PlanOptimizer.analyze pass
   5. Generate a plan automatically from Goal objects with PlanGenerator
 
 Run this file directly to verify your installation:
@@ -17,9 +17,6 @@ PyYAML is required for the save/load demo (pip install pyyaml).
 
 from __future__ import annotations
 
-import tempfile
-from pathlib import Path
-
 from aumai_planforge.core import (
     DependencyResolver,
     PlanBuilder,
@@ -27,7 +24,12 @@ from aumai_planforge.core import (
     PlanGenerator,
     PlanOptimizer,
 )
-from aumai_planforge.models import Goal, Plan, PlanStep, PlanValidation
+from aumai_planforge.models import Goal, Plan, PlanAnalysis, PlanStep, PlanValidation
+
+# Shared services, created once and reused by every demo (as cli.py does)
+_BUILDER = PlanBuilder()
+_OPTIMIZER = PlanOptimizer(builder=_BUILDER)
+_GENERATOR = PlanGenerator()
 
 
 # ---------------------------------------------------------------------------
@@ -41,7 +43,7 @@ def demo_plan_builder() -> Plan:
     print("Demo 1: PlanBuilder — create a plan with dependencies")
     print("=" * 60)
 
-    builder = PlanBuilder()
+    builder = _BUILDER
     plan = builder.create(
         name="Release v2.0",
         goal="Ship version 2.0 to production with zero downtime",
@@ -103,14 +105,17 @@ def demo_plan_builder() -> Plan:
 # ---------------------------------------------------------------------------
 
 
-def demo_validation(plan: Plan) -> None:
-    """Validate the plan and display the result."""
+def demo_validation(plan: Plan, ordered: list[PlanStep]) -> None:
+    """Validate the plan and display the result.
+
+    ``ordered`` is the plan's topological order, computed once in ``main()``
+    and shared with the later demos instead of re-sorting here.
+    """
     print("=" * 60)
     print("Demo 2: PlanBuilder.validate — structural correctness check")
     print("=" * 60)
 
-    builder = PlanBuilder()
-    result: PlanValidation = builder.validate(plan)
+    result: PlanValidation = _BUILDER.validate(plan)
 
     if result.valid:
         print(f"\n  Plan '{plan.name}' is VALID.")
@@ -122,12 +127,12 @@ def demo_validation(plan: Plan) -> None:
         for issue in result.issues:
             print(f"    - {issue}")
 
-    # Topological sort
-    ordered = builder.topological_sort(plan)
     print("\n  Topological execution order:")
-    for i, step in enumerate(ordered, 1):
-        deps = f"deps={step.dependencies}" if step.dependencies else "no deps"
-        print(f"    {i}. [{step.priority}] {step.action[:45]}  ({deps})")
+    print("\n".join([
+        f"    {i}. [{step.priority}] {step.action[:45]}  "
+        f"({f'deps={step.dependencies}' if step.dependencies else 'no deps'})"
+        for i, step in enumerate(ordered, 1)
+    ]))
     print()
 
 
@@ -136,22 +141,20 @@ def demo_validation(plan: Plan) -> None:
 # ---------------------------------------------------------------------------
 
 
-def demo_parallelism(plan: Plan) -> None:
+def demo_parallelism(analysis: PlanAnalysis) -> None:
     """Show which steps can run concurrently."""
     print("=" * 60)
     print("Demo 3: PlanOptimizer — parallel execution waves")
     print("=" * 60)
 
-    optimizer = PlanOptimizer()
-    waves = optimizer.parallelize(plan)
+    waves = analysis.waves
 
     print(f"\n  Parallel waves: {len(waves)}")
-    for i, wave in enumerate(waves):
-        wave_duration = max(s.estimated_duration_seconds for s in wave)
+    wave_durations = analysis.wave_durations
+    for i, (wave, wave_duration) in enumerate(zip(waves, wave_durations, strict=True)):
         print(f"\n  Wave {i + 1} (max duration: {wave_duration:.0f}s, "
               f"{len(wave)} step{'s' if len(wave) != 1 else ''}):")
-        for step in wave:
-            print(f"    [{step.priority}] {step.action}")
+        print("\n".join([f"    [{s.priority}] {s.action}" for s in wave]))
 
     print()
 
@@ -161,22 +164,21 @@ def demo_parallelism(plan: Plan) -> None:
 # ---------------------------------------------------------------------------
 
 
-def demo_critical_path(plan: Plan) -> None:
+def demo_critical_path(
+    plan: Plan, analysis: PlanAnalysis, resolver: DependencyResolver
+) -> None:
     """Identify the critical path and compute minimum possible duration."""
     print("=" * 60)
-    print("Demo 4: DependencyResolver — critical path analysis")
+    print("Demo 4: PlanOptimizer.analyze — critical path analysis")
     print("=" * 60)
 
-    resolver = DependencyResolver(plan.steps)
-
-    # Critical path
-    path = resolver.critical_path()
-    critical_duration = resolver.total_duration_seconds()
-    step_map = {s.step_id: s for s in plan.steps}
+    # The critical path comes out of the same sweep that produced the waves
+    path = analysis.critical_path
+    critical_duration = analysis.critical_path_duration
 
     print(f"\n  Critical path ({len(path)} steps, {critical_duration:.0f}s total):")
     for step_id in path:
-        step = step_map[step_id]
+        step = plan.step_index[step_id]
         print(f"    -> {step.action} ({step.estimated_duration_seconds:.0f}s)")
 
     # Cycle check
@@ -200,8 +202,6 @@ def demo_plan_generator() -> None:
     print("Demo 5: PlanGenerator — HTN-style goal decomposition")
     print("=" * 60)
 
-    generator = PlanGenerator()
-
     goals = [
         Goal(
             goal_id="g1",
@@ -220,7 +220,7 @@ def demo_plan_generator() -> None:
         ),
     ]
 
-    plan = generator.generate(goals, plan_name="Infrastructure Bootstrap")
+    plan = _GENERATOR.generate(goals, plan_name="Infrastructure Bootstrap")
 
     print(f"\n  Generated plan: '{plan.name}'")
     print(f"  Goals processed: {len(goals)}")
@@ -231,16 +231,18 @@ def demo_plan_generator() -> None:
           f"({plan.estimated_duration_seconds / 60:.1f} min)")
 
     print("\n  Step breakdown:")
-    for step in plan.steps:
-        dep_count = len(step.dependencies)
-        print(f"    [{step.step_id:15s}] {step.action[:45]} "
-              f"({step.estimated_duration_seconds:.0f}s, {dep_count} dep)")
+    # One write for the whole table rather than one print per step
+    print("\n".join([
+        f"    [{sid:15s}] {action[:45]} ({duration:.0f}s, {len(deps)} dep)"
+        for sid, action, duration, deps in (
+            (s.step_id, s.action, s.estimated_duration_seconds, s.dependencies)
+            for s in plan.steps
+        )
+    ]))
 
     # Validate and optimize the generated plan
-    builder = PlanBuilder()
-    validation = builder.validate(plan)
-    optimizer = PlanOptimizer()
-    waves = optimizer.parallelize(plan)
+    validation = _BUILDER.validate(plan)
+    waves = _OPTIMIZER.parallelize(plan)
 
     print(f"\n  Validation: {'VALID' if validation.valid else 'INVALID'}")
     print(f"  Parallel waves: {len(waves)}")
@@ -258,22 +260,23 @@ def demo_save_load(plan: Plan) -> None:
     print("Bonus: PlanBuilder save/load — YAML round-trip")
     print("=" * 60)
 
-    builder = PlanBuilder()
+    import importlib.util
 
-    try:
-        import yaml  # noqa: F401
-    except ImportError:
+    if importlib.util.find_spec("yaml") is None:
         print("\n  PyYAML not installed. Skipping save/load demo.")
         print("  Install with: pip install pyyaml")
         print()
         return
 
+    import tempfile
+    from pathlib import Path
+
     with tempfile.TemporaryDirectory() as tmpdir:
         path = str(Path(tmpdir) / "release_plan.yaml")
-        builder.save(plan, path)
+        _BUILDER.save(plan, path)
         print(f"\n  Saved plan to: {path}")
 
-        loaded = builder.load(path)
+        loaded = _BUILDER.load(path)
         print(f"  Loaded plan: '{loaded.name}'")
         print(f"  Steps: {len(loaded.steps)} (original: {len(plan.steps)})")
         print(f"  Goal: {loaded.goal}")
@@ -296,9 +299,14 @@ def main() -> None:
 
     # Demo 1 returns the plan for use in subsequent demos
     plan = demo_plan_builder()
-    demo_validation(plan)
-    demo_parallelism(plan)
-    demo_critical_path(plan)
+    # One resolver compiles the dependency graph once; demo 2 takes its
+    # order and demo 4 its cycle check from the same instance.
+    resolver = DependencyResolver(plan.steps)
+    demo_validation(plan, resolver.topological_sort())
+    # One fused pass yields both the waves and the critical path
+    analysis = _OPTIMIZER.analyze(plan)
+    demo_parallelism(analysis)
+    demo_critical_path(plan, analysis, resolver)
     demo_plan_generator()
     demo_save_load(plan)
 
@@ -0,0 +1,48 @@
+"""Fast random identifiers for plans and steps."""
+
+from __future__ import annotations
+
+import os
+import threading
+from base64 import urlsafe_b64encode
+
+__all__ = ["fast_uuid"]
+
+_ID_BYTES = 16
+_BUFFER_SIZE = 4096
+
+
+class _Entropy(threading.local):
+    """Per-thread buffer of ``os.urandom`` bytes, refilled when used up."""
+
+    def __init__(self) -> None:
+        self.buf = b""
+        self.pos = _BUFFER_SIZE
+
+
+_entropy = _Entropy()
+
+
+def _discard_inherited_entropy() -> None:
+    """Drop the buffer a forked child inherits, so it never repeats parent ids."""
+    _entropy.pos = _BUFFER_SIZE
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_inherited_entropy)
+
+
+def fast_uuid() -> str:
+    """Return a random 128-bit identifier as 22 URL-safe base64 characters.
+
+    Carries the same entropy as ``str(uuid.uuid4())`` but draws from a
+    per-thread ``os.urandom`` buffer and skips building a ``uuid.UUID``.
+    A forked child discards the buffer it inherits and refills its own.
+    """
+    state = _entropy
+    pos = state.pos
+    if pos == _BUFFER_SIZE:
+        state.buf = os.urandom(_BUFFER_SIZE)
+        pos = 0
+    state.pos = pos + _ID_BYTES
+    return urlsafe_b64encode(state.buf[pos : pos + _ID_BYTES])[:22].decode("ascii")
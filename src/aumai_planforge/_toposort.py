@@ -0,0 +1,178 @@
+"""Integer-indexed dependency graph and Kahn's algorithm shared by core.
+
+Step ids are interned to list positions once; the hot loops then walk
+per-step lists of integer positions instead of hashing id strings on
+every edge.
+"""
+
+from __future__ import annotations
+
+from aumai_planforge.models import PlanStep
+
+__all__ = ["CompiledSteps", "kahn_sort"]
+
+
+class CompiledSteps:
+    """Integer-indexed view of a step list.
+
+    Edges are stored twice, as one list of positions per step:
+
+    - ``preds[v]`` holds the dependencies of step ``v``, in the order the
+      step lists them;
+    - ``succs[u]`` holds the dependents of step ``u``, in ascending position
+      order.
+
+    Dependencies that do not name a step in the list are left out of the
+    graph and recorded once each in ``dangling`` as ``(position, dep_id)``
+    pairs. A dependency listed twice becomes two parallel edges, which
+    every algorithm here treats like one.
+    """
+
+    __slots__ = (
+        "steps",
+        "id_to_idx",
+        "dangling",
+        "durations",
+        "indegree",
+        "preds",
+        "is_chain",
+        "_succs",
+    )
+
+    def __init__(self, steps: list[PlanStep]) -> None:
+        self.steps = steps
+        num_steps = len(steps)
+        id_to_idx = {step.step_id: idx for idx, step in enumerate(steps)}
+        self.id_to_idx: dict[str, int] = id_to_idx
+        self.durations: list[float] = [s.estimated_duration_seconds for s in steps]
+
+        deps_per_step = [step.dependencies for step in steps]
+        preds: list[list[int]] = [
+            [id_to_idx[dep_id] for dep_id in deps if dep_id in id_to_idx]
+            for deps in deps_per_step
+        ]
+        indegree = list(map(len, preds))
+        dangling: list[tuple[int, str]] = []
+        # Only look for the missing ids when some edge was dropped.
+        if sum(indegree) != sum(map(len, deps_per_step)):
+            for idx, deps in enumerate(deps_per_step):
+                if len(deps) != indegree[idx]:
+                    dangling.extend(
+                        (idx, dep_id)
+                        for dep_id in dict.fromkeys(deps)
+                        if dep_id not in id_to_idx
+                    )
+        self.dangling = dangling
+        self.preds = preds
+        self.indegree = indegree
+        self._succs: list[list[int]] | None = None
+
+        # A "chain" lists its steps in execution order: the first has no
+        # dependencies (not even missing ones) and every later step depends
+        # on the one right before it (and possibly on others further back).
+        # Kahn's order is then the list order and every step is one level
+        # deeper than the last, as for PlanGenerator output and plans built
+        # one step at a time.
+        is_chain = num_steps == 0 or not deps_per_step[0]
+        for idx in range(1, num_steps if is_chain else 0):
+            row = preds[idx]
+            if not row or max(row) != idx - 1:
+                is_chain = False
+                break
+        self.is_chain: bool = is_chain
+
+    @property
+    def succs(self) -> list[list[int]]:
+        """Dependents of each step, built on first use.
+
+        Chains never need them, so they are not built up front.
+        """
+        succs = self._succs
+        if succs is None:
+            succs = [[] for _ in self.preds]
+            # Edges are visited by ascending owner, so each list comes out
+            # sorted.
+            for idx, row in enumerate(self.preds):
+                for dep in row:
+                    succs[dep].append(idx)
+            self._succs = succs
+        return succs
+
+    def kahn_order(self) -> list[int]:
+        """Return step positions in dependency order (Kahn's algorithm).
+
+        Steps that sit on or behind a cycle are left out; callers compare the
+        result's length with ``len(steps)`` to detect one.
+        """
+        if self.is_chain:
+            return list(range(len(self.steps)))
+
+        in_degree = self.indegree.copy()
+        succs = self.succs
+        # The output list doubles as the FIFO queue: iterating over a list
+        # also visits items appended to it during the loop.
+        order = [idx for idx, degree in enumerate(in_degree) if degree == 0]
+        append = order.append
+
+        for current in order:
+            for neighbor in succs[current]:
+                remaining = in_degree[neighbor] - 1
+                in_degree[neighbor] = remaining
+                if not remaining:
+                    append(neighbor)
+
+        return order
+
+    def kahn_levels(self) -> tuple[list[int], list[int]]:
+        """Return :meth:`kahn_order` together with each step's level.
+
+        A step's level is 0 without dependencies, otherwise one more than
+        its deepest dependency; a missing dependency counts as one at level
+        0. Levels are relaxed while in-degrees are decremented, so both come
+        out of a single sweep. Levels of steps left out of the order are
+        meaningless.
+        """
+        if self.is_chain:
+            order = list(range(len(self.steps)))
+            return order, list(order)
+
+        in_degree = self.indegree.copy()
+        succs = self.succs
+        level = [0] * len(self.steps)
+        for idx, _ in self.dangling:
+            level[idx] = 1
+        order = [idx for idx, degree in enumerate(in_degree) if degree == 0]
+        append = order.append
+
+        for current in order:
+            next_level = level[current] + 1
+            for neighbor in succs[current]:
+                if next_level > level[neighbor]:
+                    level[neighbor] = next_level
+                remaining = in_degree[neighbor] - 1
+                in_degree[neighbor] = remaining
+                if not remaining:
+                    append(neighbor)
+
+        return order, level
+
+
+def kahn_sort(steps: list[PlanStep]) -> tuple[list[int], list[str], list[int]]:
+    """Topologically sort ``steps`` by position.
+
+    Args:
+        steps: Steps to sort; dependencies on unknown ids are ignored.
+
+    Returns:
+        ``(order, step_ids, unsorted)``: positions in dependency order, the
+        step id at each position, and the positions left out because they
+        sit on or behind a cycle (empty for a DAG).
+    """
+    graph = CompiledSteps(steps)
+    order = graph.kahn_order()
+    step_ids = [step.step_id for step in steps]
+    unsorted: list[int] = []
+    if len(order) != len(steps):
+        placed = set(order)
+        unsorted = [idx for idx in range(len(steps)) if idx not in placed]
+    return order, step_ids, unsorted
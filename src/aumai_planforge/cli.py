@@ -2,17 +2,35 @@
 
 from __future__ import annotations
 
-import json
+import functools
 import sys
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 
 import click
 
-from aumai_planforge.core import PlanBuilder, PlanExecutor, PlanOptimizer
+if TYPE_CHECKING:
+    from aumai_planforge.core import PlanBuilder, PlanOptimizer
+    from aumai_planforge.models import Plan, PlanAnalysis, PlanValidation
 
-_builder = PlanBuilder()
-_executor = PlanExecutor(builder=_builder)
-_optimizer = PlanOptimizer(builder=_builder)
+_T = TypeVar("_T")
+
+
+# The core module pulls in pydantic; import it on first use so that
+# `--help` and `--version` only pay for click.
+@functools.cache
+def _builder() -> PlanBuilder:
+    from aumai_planforge.core import PlanBuilder
+
+    return PlanBuilder()
+
+
+@functools.cache
+def _optimizer() -> PlanOptimizer:
+    from aumai_planforge.core import PlanOptimizer
+
+    return PlanOptimizer(builder=_builder())
 
 
 @click.group()
@@ -21,6 +39,19 @@ def main() -> None:
     """AumAI PlanForge — Agent planning and strategy generation CLI."""
 
 
+def _run_coroutine(coro: Coroutine[Any, Any, _T]) -> _T:
+    """Run ``coro`` to completion, on a uvloop event loop when it is installed."""
+    import asyncio
+
+    try:
+        import uvloop  # type: ignore[import-not-found,unused-ignore]
+    except ImportError:
+        return asyncio.run(coro)
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(coro)
+
+
 @main.command("create")
 @click.option("--name", required=True, help="Plan name.")
 @click.option("--goal", required=True, help="Goal or objective of the plan.")
@@ -28,17 +59,33 @@ def main() -> None:
     "--output",
     type=click.Path(dir_okay=False, path_type=Path),
     default=None,
-    help="Save the plan to this YAML file.",
+    help="Save the plan to this file (JSON if it ends in .json, otherwise YAML).",
 )
 def create(name: str, goal: str, output: Path | None) -> None:
     """Create a new empty plan."""
-    plan = _builder.create(name=name, goal=goal)
-    click.echo(f"Created plan '{name}' (ID: {plan.plan_id})")
-    click.echo(f"Goal: {goal}")
+    _, report = _do_create(name, goal, output)
+    click.echo(report)
+
+
+def _do_create(name: str, goal: str, output: Path | None) -> tuple[Plan, str]:
+    """Create a plan, optionally save it, and render the ``create`` report.
+
+    Args:
+        name: Plan name.
+        goal: Goal or objective of the plan.
+        output: File to save the plan to, or ``None`` to keep it in memory.
+
+    Returns:
+        The new plan and the text the ``create`` command prints.
+    """
+    plan = _builder().create(name=name, goal=goal)
+    out = [f"Created plan '{name}' (ID: {plan.plan_id})", f"Goal: {goal}"]
 
     if output is not None:
-        _builder.save(plan, str(output))
-        click.echo(f"Plan saved to {output}")
+        _builder().save(plan, str(output))
+        out.append(f"Plan saved to {output}")
+
+    return plan, "\n".join(out)
 
 
 @main.command("validate")
@@ -47,27 +94,42 @@ def create(name: str, goal: str, output: Path | None) -> None:
     "plan_file",
     required=True,
     type=click.Path(exists=True, dir_okay=False, path_type=Path),
-    help="Path to plan YAML file.",
+    help="Path to plan YAML or JSON file.",
 )
 def validate(plan_file: Path) -> None:
     """Validate a plan for structural correctness."""
     try:
-        plan = _builder.load(str(plan_file))
+        plan = _builder().load(str(plan_file))
     except Exception as exc:
-        click.echo(f"Failed to load plan: {exc}", err=True)
+        raise click.ClickException(f"Failed to load plan: {exc}") from exc
+
+    result, report = _do_validate(plan)
+    click.echo(report)
+    if not result.valid:
         sys.exit(1)
 
-    result = _builder.validate(plan)
+
+def _do_validate(plan: Plan) -> tuple[PlanValidation, str]:
+    """Validate ``plan`` and render the ``validate`` report.
+
+    Args:
+        plan: The loaded plan.
+
+    Returns:
+        The validation result and the text the ``validate`` command prints.
+    """
+    result = _builder().validate(plan)
 
     if result.valid:
-        click.echo(f"Plan '{plan.name}' is valid.")
-        click.echo(f"  Steps:               {len(plan.steps)}")
-        click.echo(f"  Estimated duration:  {result.estimated_total_duration:.1f}s")
+        out = [
+            f"Plan '{plan.name}' is valid.",
+            f"  Steps:               {len(plan.steps)}",
+            f"  Estimated duration:  {result.estimated_total_duration:.1f}s",
+        ]
     else:
-        click.echo(f"Plan '{plan.name}' has validation issues:")
-        for issue in result.issues:
-            click.echo(f"  - {issue}")
-        sys.exit(1)
+        out = [f"Plan '{plan.name}' has validation issues:"]
+        out.extend(f"  - {issue}" for issue in result.issues)
+    return result, "\n".join(out)
 
 
 @main.command("optimize")
@@ -76,32 +138,53 @@ def validate(plan_file: Path) -> None:
     "plan_file",
     required=True,
     type=click.Path(exists=True, dir_okay=False, path_type=Path),
-    help="Path to plan YAML file.",
+    help="Path to plan YAML or JSON file.",
 )
 def optimize(plan_file: Path) -> None:
-    """Show parallel execution waves for a plan."""
+    """Show parallel execution waves and the critical path for a plan."""
     try:
-        plan = _builder.load(str(plan_file))
+        plan = _builder().load(str(plan_file))
     except Exception as exc:
-        click.echo(f"Failed to load plan: {exc}", err=True)
-        sys.exit(1)
+        raise click.ClickException(f"Failed to load plan: {exc}") from exc
 
     try:
-        waves = _optimizer.parallelize(plan)
+        _, report = _do_optimize(plan)
     except ValueError as exc:
-        click.echo(f"Optimization failed: {exc}", err=True)
-        sys.exit(1)
+        raise click.ClickException(f"Optimization failed: {exc}") from exc
+    # One write for the whole report instead of one per wave
+    click.echo(report)
 
-    click.echo(f"Plan '{plan.name}' — {len(waves)} parallel wave(s):")
-    for wave_idx, wave_steps in enumerate(waves):
-        wave_duration = max(
-            (s.estimated_duration_seconds for s in wave_steps), default=0.0
-        )
+
+def _do_optimize(plan: Plan) -> tuple[PlanAnalysis, str]:
+    """Analyze ``plan`` and render the ``optimize`` report.
+
+    Args:
+        plan: The loaded plan.
+
+    Returns:
+        The wave/critical-path analysis and the text the ``optimize``
+        command prints.
+
+    Raises:
+        CircularDependencyError: If the plan contains a cycle.
+    """
+    analysis = _optimizer().analyze(plan)
+
+    waves = analysis.waves
+    out: list[str] = [f"Plan '{plan.name}' — {len(waves)} parallel wave(s):"]
+    for wave_idx, (wave_steps, wave_duration) in enumerate(
+        zip(waves, analysis.wave_durations, strict=True)
+    ):
         step_names = ", ".join(f"'{s.action[:30]}'" for s in wave_steps)
-        click.echo(
+        out.append(
             f"  Wave {wave_idx + 1} ({len(wave_steps)} steps, "
             f"~{wave_duration:.1f}s): {step_names}"
         )
+    out.append(
+        f"Critical path: {len(analysis.critical_path)} step(s), "
+        f"~{analysis.critical_path_duration:.1f}s"
+    )
+    return analysis, "\n".join(out)
 
 
 @main.command("run")
@@ -110,26 +193,46 @@ def optimize(plan_file: Path) -> None:
     "plan_file",
     required=True,
     type=click.Path(exists=True, dir_okay=False, path_type=Path),
-    help="Path to plan YAML file.",
+    help="Path to plan YAML or JSON file.",
 )
 def run(plan_file: Path) -> None:
     """Execute a plan and print the result."""
     try:
-        plan = _builder.load(str(plan_file))
+        plan = _builder().load(str(plan_file))
     except Exception as exc:
-        click.echo(f"Failed to load plan: {exc}", err=True)
-        sys.exit(1)
+        raise click.ClickException(f"Failed to load plan: {exc}") from exc
 
     click.echo(f"Executing plan '{plan.name}' ({len(plan.steps)} steps)...")
-    result = _executor.execute(plan)
+    result, report = _do_run(plan)
+
+    if result.get("error"):
+        raise click.ClickException(f"Execution failed: {result['error']}")
+    click.echo(report)
 
-    click.echo(f"\nStatus: {result['status']}")
-    click.echo(f"Steps completed: {result['steps_completed']}")
-    click.echo(f"Duration: {result['total_duration_seconds']:.3f}s")
 
+def _do_run(plan: Plan) -> tuple[dict[str, object], str]:
+    """Execute ``plan`` and render the ``run`` summary.
+
+    Args:
+        plan: The loaded plan; its step and plan statuses are updated.
+
+    Returns:
+        The executor's result dict and the summary the ``run`` command
+        prints on success. Failures are reported under ``result["error"]``.
+    """
+    from aumai_planforge.core import PlanExecutor
+
+    executor = PlanExecutor(builder=_builder())
+    result = _run_coroutine(executor.execute_async(plan))
     if result.get("error"):
-        click.echo(f"Error: {result['error']}", err=True)
-        sys.exit(1)
+        return result, ""
+
+    out = [
+        f"\nStatus: {result['status']}",
+        f"Steps completed: {result['steps_completed']}",
+        f"Duration: {result['total_duration_seconds']:.3f}s",
+    ]
+    return result, "\n".join(out)
 
 
 if __name__ == "__main__":
@@ -3,23 +3,33 @@
 Provides:
 - PlanBuilder: create, validate, topologically sort, and save/load plans
 - PlanExecutor: execute plans in dependency order with step tracking
-- PlanOptimizer: parallelize steps into execution waves
+- PlanOptimizer: parallelize steps into execution waves and analyse the
+  critical path in a single pass
 - DependencyResolver: critical-path analysis on a step list
 - PlanGenerator: generate plans from Goal objects (HTN decomposition)
 """
 
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
 import time
-import uuid
-from collections import Counter, defaultdict, deque
+import weakref
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any
 
+from pydantic_core import to_json
+
+from aumai_planforge._ids import fast_uuid
+from aumai_planforge._toposort import CompiledSteps
 from aumai_planforge.models import (
     ExecutionState,
     Goal,
     Plan,
+    PlanAnalysis,
     PlanStatus,
     PlanStep,
     PlanValidation,
@@ -34,10 +44,152 @@ __all__ = [
 ]
 
 
+_UTC = timezone.utc
+
+
+def _ns_to_seconds(elapsed_ns: int) -> float:
+    """Convert a ``time.monotonic_ns`` delta to seconds, rounded to 0.1 ms."""
+    return round(elapsed_ns, -5) / 1e9
+
+
 class CircularDependencyError(ValueError):
     """Raised when a circular dependency is detected in a plan."""
 
 
+def _check_sorted(sorted_count: int, total: int) -> None:
+    """Raise unless a Kahn pass managed to place all ``total`` steps.
+
+    Raises:
+        CircularDependencyError: If the dependency graph contains a cycle.
+    """
+    if sorted_count != total:
+        raise CircularDependencyError(
+            "Circular dependency detected in plan. "
+            f"Could not sort {total - sorted_count} steps."
+        )
+
+
+def _wave_positions(graph: CompiledSteps) -> list[list[int]]:
+    """Return ``graph``'s parallel waves as priority-sorted step positions.
+
+    Raises:
+        CircularDependencyError: If the dependency graph contains a cycle.
+    """
+    order, wave_of = graph.kahn_levels()
+    _check_sorted(len(order), len(graph.steps))
+    return _group_waves(graph, order, wave_of)
+
+
+def _group_waves(
+    graph: CompiledSteps, order: list[int], wave_of: list[int]
+) -> list[list[int]]:
+    """Bucket the positions in ``order`` by wave, each sorted by priority.
+
+    Waves with no steps in them are kept, so a step's wave index is always
+    its level.
+    """
+    if not order:
+        return []
+
+    waves: list[list[int]] = [[] for _ in range(max(wave_of) + 1)]
+    for idx in order:
+        waves[wave_of[idx]].append(idx)
+
+    # Within each wave, sort by priority (ascending = higher priority first)
+    steps = graph.steps
+    for wave in waves:
+        if len(wave) > 1:
+            wave.sort(key=lambda idx: steps[idx].priority)
+
+    return waves
+
+
+def _longest_paths(
+    graph: CompiledSteps, order: list[int]
+) -> tuple[list[float], list[int]]:
+    """Run the longest-path DP over ``graph`` in topological ``order``.
+
+    Returns:
+        ``(finish, predecessor)``: each step's earliest finish time and the
+        position of the dependency that determines it (``-1`` for none).
+    """
+    preds = graph.preds
+    finish = list(graph.durations)
+    predecessor = [-1] * len(finish)
+
+    # One scan per node yields both the best finish time and the
+    # predecessor that produced it; the first strictly larger finish wins
+    # ties, and zero-length chains do not become predecessors.
+    for idx in order:
+        best = -1
+        best_finish = 0.0
+        for dep in preds[idx]:
+            dep_finish = finish[dep]
+            if dep_finish > best_finish:
+                best_finish = dep_finish
+                best = dep
+        if best != -1:
+            finish[idx] += best_finish
+            predecessor[idx] = best
+
+    return finish, predecessor
+
+
+def _critical_path(
+    graph: CompiledSteps,
+    order: list[int],
+    finish: list[float],
+    predecessor: list[int],
+) -> list[int]:
+    """Return the positions on the path to the latest-finishing step.
+
+    Among steps finishing at the same time the first in ``order`` wins.
+    """
+    if not order:
+        return []
+
+    path: list[int] = []
+    current = max(order, key=finish.__getitem__)
+    while current != -1:
+        path.append(current)
+        current = predecessor[current]
+    path.reverse()
+    return path
+
+
+class _BuildRecord:
+    """What :class:`PlanBuilder` knows about a plan grown only through it.
+
+    ``steps`` holds the ``(step_id, dependencies)`` of every step, in order,
+    each depending only on ids earlier in the record; ``ids`` is the set of
+    recorded ids. While a plan's steps still match its record the plan is
+    valid by construction.
+
+    Records live in ``_build_records``, keyed by plan identity, rather than
+    on the plan itself: they must not take part in model equality, and
+    copies of a plan must not share them. An entry goes away with its plan.
+    """
+
+    __slots__ = ("plan_ref", "steps", "ids")
+
+    def __init__(self, plan: Plan) -> None:
+        key = id(plan)
+        self.plan_ref = weakref.ref(plan, lambda _: _build_records.pop(key, None))
+        self.steps: list[tuple[str, tuple[str, ...]]] = []
+        self.ids: set[str] = set()
+
+
+_build_records: dict[int, _BuildRecord] = {}
+
+
+def _build_record(plan: Plan) -> _BuildRecord | None:
+    """Return the builder's record for ``plan``, if it still has one."""
+    record = _build_records.get(id(plan))
+    if record is None or record.plan_ref() is not plan:
+        return None
+    return record
+
+
 class PlanBuilder:
     """Build, validate, and sort execution plans."""
 
@@ -51,12 +203,14 @@ class PlanBuilder:
         Returns:
             A new Plan in 'draft' status.
         """
-        return Plan(
-            plan_id=str(uuid.uuid4()),
+        plan = Plan(
+            plan_id=fast_uuid(),
             name=name,
             goal=goal,
-            created_at=datetime.now(tz=timezone.utc),
+            created_at=datetime.now(tz=_UTC),
         )
+        _build_records[id(plan)] = _BuildRecord(plan)
+        return plan
 
     def add_step(
         self,
@@ -79,12 +233,33 @@ class PlanBuilder:
             The newly created PlanStep.
         """
         step = PlanStep(
-            step_id=str(uuid.uuid4()),
+            step_id=fast_uuid(),
             action=action,
             dependencies=dependencies,
             estimated_duration_seconds=duration,
             priority=priority,
         )
+
+        # A step whose dependencies are all recorded ids cannot close a cycle
+        # or dangle; extend the record instead of dropping it. Edits made to
+        # ``steps`` behind the builder's back are caught by validate(), which
+        # compares the record with the steps as they are now.
+        record = _build_record(plan)
+        if (
+            record is not None
+            and len(record.steps) == len(plan.steps)
+            and step.step_id not in record.ids
+            and all(dep_id in record.ids for dep_id in step.dependencies)
+        ):
+            record.steps.append((step.step_id, tuple(step.dependencies)))
+            record.ids.add(step.step_id)
+            if "step_index" in plan.__dict__:
+                plan.step_index[step.step_id] = step
+        else:
+            if record is not None:
+                del _build_records[id(plan)]
+            plan.__dict__.pop("step_index", None)
+
         plan.steps.append(step)
         return step
 
@@ -96,43 +271,66 @@ class PlanBuilder:
         - All dependency references exist
         - No circular dependencies (via topological sort)
 
+        Plans built solely through :meth:`create` and :meth:`add_step` are
+        structurally valid by construction. While every step's id and
+        dependencies still match what the builder recorded, they return
+        without building the graph; any direct edit falls through to the
+        full check.
+
         Args:
             plan: The plan to validate.
 
         Returns:
             PlanValidation with issues list and duration estimate.
         """
+        record = _build_record(plan)
+        if record is not None and record.steps == [
+            (step.step_id, tuple(step.dependencies)) for step in plan.steps
+        ]:
+            return PlanValidation(
+                plan=plan,
+                valid=True,
+                estimated_total_duration=sum(
+                    step.estimated_duration_seconds for step in plan.steps
+                ),
+            )
+
+        # One pass over the steps interns ids, builds the edges and records
+        # dependencies that name no step.
+        graph = self._compile(plan)
         issues: list[str] = []
-        step_ids = {step.step_id for step in plan.steps}
+        tags: set[str] = set()
 
         # Duplicate IDs
-        if len(step_ids) != len(plan.steps):
+        if len(graph.id_to_idx) != len(plan.steps):
             issues.append("Duplicate step_ids detected.")
+            tags.add("duplicate-id")
 
         # Missing dependencies
-        for step in plan.steps:
-            for dep_id in step.dependencies:
-                if dep_id not in step_ids:
-                    issues.append(
-                        f"Step '{step.step_id}' depends on '{dep_id}' which does not exist."
-                    )
+        if graph.dangling:
+            issues.extend(
+                f"Step '{plan.steps[idx].step_id}' depends on '{dep_id}' "
+                "which does not exist."
+                for idx, dep_id in graph.dangling
+            )
+            tags.add("missing-dep")
 
         # Circular dependency check
         if not issues:
             try:
-                sorted_steps = self.topological_sort(plan)
-                # Estimate total sequential duration
-                total_duration = sum(s.estimated_duration_seconds for s in sorted_steps)
+                _check_sorted(len(graph.kahn_order()), len(plan.steps))
             except CircularDependencyError as exc:
                 issues.append(str(exc))
-                total_duration = sum(s.estimated_duration_seconds for s in plan.steps)
-        else:
-            total_duration = sum(s.estimated_duration_seconds for s in plan.steps)
+                tags.add("circular-dep")
+
+        # Estimate total sequential duration
+        total_duration = sum(graph.durations)
 
         return PlanValidation(
             plan=plan,
             valid=len(issues) == 0,
             issues=issues,
+            issue_tags=frozenset(tags),
             estimated_total_duration=total_duration,
         )
 
@@ -148,39 +346,20 @@ class PlanBuilder:
         Raises:
             CircularDependencyError: If the dependency graph contains a cycle.
         """
-        step_map = {step.step_id: step for step in plan.steps}
-        in_degree: dict[str, int] = {step.step_id: 0 for step in plan.steps}
-        adjacency: dict[str, list[str]] = defaultdict(list)
-
-        for step in plan.steps:
-            for dep_id in step.dependencies:
-                if dep_id in step_map:
-                    adjacency[dep_id].append(step.step_id)
-                    in_degree[step.step_id] += 1
-
-        queue: deque[str] = deque(
-            step_id for step_id, degree in in_degree.items() if degree == 0
-        )
-        sorted_ids: list[str] = []
-
-        while queue:
-            current_id = queue.popleft()
-            sorted_ids.append(current_id)
-            for neighbor_id in adjacency[current_id]:
-                in_degree[neighbor_id] -= 1
-                if in_degree[neighbor_id] == 0:
-                    queue.append(neighbor_id)
-
-        if len(sorted_ids) != len(plan.steps):
-            raise CircularDependencyError(
-                "Circular dependency detected in plan. "
-                f"Could not sort {len(plan.steps) - len(sorted_ids)} steps."
-            )
+        steps = plan.steps
+        order = self._compile(plan).kahn_order()
+        _check_sorted(len(order), len(steps))
+        return [steps[idx] for idx in order]
 
-        return [step_map[step_id] for step_id in sorted_ids]
+    def _compile(self, plan: Plan) -> CompiledSteps:
+        """Build the integer-indexed dependency graph for ``plan``'s steps."""
+        return CompiledSteps(plan.steps)
 
     def save(self, plan: Plan, path: str) -> None:
-        """Persist a plan to a YAML file.
+        """Persist a plan to a YAML or JSON file.
+
+        Paths ending in ``.json`` are written as JSON straight from
+        pydantic-core; anything else is written as YAML.
 
         Args:
             plan: The plan to save.
@@ -188,17 +367,31 @@ class PlanBuilder:
         """
         from pathlib import Path
 
-        import yaml  # type: ignore[import-untyped]
-
         output_path = Path(path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_path.suffix.lower() == ".json":
+            # pydantic-core emits UTF-8 bytes directly, with no str round-trip
+            output_path.write_bytes(to_json(plan, indent=2))
+            return
+
+        import yaml  # type: ignore[import-untyped]
+
+        try:
+            from yaml import CSafeDumper as Dumper
+        except ImportError:  # PyYAML built without libyaml
+            from yaml import SafeDumper as Dumper
+
         output_path.write_text(
-            yaml.dump(plan.model_dump(mode="json"), allow_unicode=True),
+            yaml.dump(plan.model_dump(mode="json"), Dumper=Dumper, allow_unicode=True),
             encoding="utf-8",
         )
 
     def load(self, path: str) -> Plan:
-        """Load a plan from a YAML file.
+        """Load a plan from a YAML or JSON file.
+
+        Paths ending in ``.json`` are parsed as JSON by pydantic-core;
+        anything else is parsed as YAML.
 
         Args:
             path: Input file path.
@@ -208,24 +401,58 @@ class PlanBuilder:
         """
         from pathlib import Path
 
+        input_path = Path(path)
+        if input_path.suffix.lower() == ".json":
+            return Plan.model_validate_json(input_path.read_bytes())
+
         import yaml  # type: ignore[import-untyped]
 
-        raw = Path(path).read_text(encoding="utf-8")
-        data: dict[str, object] = yaml.safe_load(raw)
+        try:
+            from yaml import CSafeLoader as Loader
+        except ImportError:  # PyYAML built without libyaml
+            from yaml import SafeLoader as Loader
+
+        raw = input_path.read_text(encoding="utf-8")
+        data: dict[str, object] = yaml.load(raw, Loader=Loader)  # noqa: S506
         return Plan.model_validate(data)
 
 
 class PlanExecutor:
-    """Execute a plan by running steps in dependency order."""
+    """Execute a plan by running steps in dependency order.
 
-    def __init__(self, builder: PlanBuilder | None = None) -> None:
+    Args:
+        builder: Builder used to compile plans; a new one by default.
+        max_workers: Threads :meth:`execute` may run a wave's steps on.
+            ``None`` means ``os.cpu_count()``; ``1`` runs every step on the
+            calling thread.
+
+    Raises:
+        ValueError: If ``max_workers`` is less than 1.
+    """
+
+    def __init__(
+        self, builder: PlanBuilder | None = None, max_workers: int | None = None
+    ) -> None:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}.")
         self._builder = builder or PlanBuilder()
+        self._max_workers = (
+            max_workers if max_workers is not None else os.cpu_count() or 1
+        )
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_pid = 0
+        self._pool_lock = threading.Lock()
 
     def execute(self, plan: Plan) -> dict[str, object]:
-        """Execute all plan steps in dependency order.
+        """Execute plan steps wave by wave on a thread pool.
 
-        Steps are executed sequentially. A step is skipped if any of its
-        dependencies failed.
+        Waves are those of :meth:`PlanOptimizer.parallelize`; each step runs
+        through :meth:`_run_step`, and the next wave starts once all of them
+        have finished. A wave with several runnable steps is dispatched to
+        the executor's thread pool, which is started on first use and kept
+        for later waves and calls; a wave with one runs on the calling
+        thread. A step whose :meth:`_run_step` raises is marked failed, and
+        a step is skipped if any of its dependencies failed or was skipped.
 
         Args:
             plan: The plan to execute.
@@ -233,13 +460,14 @@ class PlanExecutor:
         Returns:
             Execution summary with step statuses and total duration.
         """
-        start_time = time.monotonic()
-        completed_ids: set[str] = set()
-        failed_ids: set[str] = set()
+        start_ns = time.monotonic_ns()
+        steps_completed = 0
+        steps_failed = 0
         step_log: list[dict[str, object]] = []
 
         try:
-            ordered_steps = self._builder.topological_sort(plan)
+            graph = self._builder._compile(plan)
+            waves = _wave_positions(graph)
         except CircularDependencyError as exc:
             return {
                 "status": "failed",
@@ -248,46 +476,235 @@ class PlanExecutor:
                 "duration_seconds": 0.0,
             }
 
-        for step in ordered_steps:
-            # Check if any dependency failed
-            if any(dep_id in failed_ids for dep_id in step.dependencies):
-                step.status = "skipped"
-                step_log.append({
-                    "step_id": step.step_id,
-                    "action": step.action,
-                    "status": "skipped",
-                    "reason": "dependency failed",
-                })
+        steps = graph.steps
+        # blocked[idx] is set once a step has failed or been skipped
+        blocked = bytearray(len(steps))
+        for wave in waves:
+            # Nothing is blocked until a step has failed
+            runnable = (
+                self._runnable_positions(graph, wave, blocked, step_log)
+                if steps_failed
+                else wave
+            )
+            if len(runnable) <= 1 or self._max_workers == 1:
+                # Handing a step to a thread costs far more than the default
+                # step itself, so a lone step runs right here.
+                for idx in runnable:
+                    try:
+                        entry = self._run_step(steps[idx])
+                    except Exception as exc:
+                        steps_failed += 1
+                        self._record_failure(steps[idx], idx, exc, blocked, step_log)
+                    else:
+                        steps_completed += 1
+                        step_log.append(entry)
                 continue
 
-            step.status = "running"
-            step_start = time.monotonic()
+            pool = self._thread_pool()
+            futures = [pool.submit(self._run_step, steps[idx]) for idx in runnable]
+            # Results are collected on this thread, so the counters, the
+            # bitmap and the log need no locking.
+            for idx, future in zip(runnable, futures, strict=True):
+                error = future.exception()
+                if error is None:
+                    steps_completed += 1
+                    step_log.append(future.result())
+                else:
+                    steps_failed += 1
+                    self._record_failure(steps[idx], idx, error, blocked, step_log)
+
+        total_ns = time.monotonic_ns() - start_ns
+        all_completed = steps_completed == len(plan.steps)
+        plan.status = "completed" if all_completed else "failed"
+
+        return {
+            "plan_id": plan.plan_id,
+            "status": plan.status,
+            "steps_completed": steps_completed,
+            "steps_failed": steps_failed,
+            "total_duration_seconds": _ns_to_seconds(total_ns),
+            "steps": step_log,
+        }
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        """Return the worker pool, starting it on first use.
+
+        A forked child starts a fresh pool: the parent's worker threads do
+        not exist there.
+        """
+        with self._pool_lock:
+            pid = os.getpid()
+            if self._pool is None or self._pool_pid != pid:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers)
+                self._pool_pid = pid
+            return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started.
+
+        The executor stays usable; a later :meth:`execute` starts a new pool
+        when it needs one.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def _run_step(self, step: PlanStep) -> dict[str, object]:
+        """Run a single step for :meth:`execute` and return its log entry.
 
-            # Simulate execution (in production this would dispatch to real handlers)
-            step.status = "completed"
-            completed_ids.add(step.step_id)
-            step_duration = time.monotonic() - step_start
+        Called on a pool thread, or on the calling thread for a wave with a
+        single runnable step; raise to mark the step failed.
+        """
+        step.status = "running"
+        step_start_ns = time.monotonic_ns()
+
+        # Simulate execution (in production this would dispatch to real handlers)
+        step.status = "completed"
+        step_ns = time.monotonic_ns() - step_start_ns
+
+        return {
+            "step_id": step.step_id,
+            "action": step.action,
+            "status": "completed",
+            "duration_seconds": _ns_to_seconds(step_ns),
+        }
 
-            step_log.append({
+    @staticmethod
+    def _record_failure(
+        step: PlanStep,
+        idx: int,
+        error: BaseException,
+        blocked: bytearray,
+        step_log: list[dict[str, object]],
+    ) -> None:
+        """Mark ``step`` failed, block its dependents and log ``error``."""
+        step.status = "failed"
+        blocked[idx] = 1
+        step_log.append(
+            {
                 "step_id": step.step_id,
                 "action": step.action,
-                "status": "completed",
-                "duration_seconds": round(step_duration, 4),
-            })
+                "status": "failed",
+                "error": str(error),
+            }
+        )
+
+    @staticmethod
+    def _runnable_positions(
+        graph: CompiledSteps,
+        wave: list[int],
+        blocked: bytearray,
+        step_log: list[dict[str, object]],
+    ) -> list[int]:
+        """Return the positions in ``wave`` whose steps may run.
+
+        Steps depending on a blocked (failed or skipped) step are marked
+        skipped, logged, and become blocked themselves.
+        """
+        preds = graph.preds
+        runnable: list[int] = []
+        for idx in wave:
+            if any(blocked[dep] for dep in preds[idx]):
+                step = graph.steps[idx]
+                step.status = "skipped"
+                blocked[idx] = 1
+                step_log.append(
+                    {
+                        "step_id": step.step_id,
+                        "action": step.action,
+                        "status": "skipped",
+                        "reason": "dependency failed",
+                    }
+                )
+            else:
+                runnable.append(idx)
+        return runnable
+
+    async def execute_async(self, plan: Plan) -> dict[str, object]:
+        """Execute plan steps wave by wave, running each wave concurrently.
 
-        total_duration = time.monotonic() - start_time
-        all_completed = len(completed_ids) == len(plan.steps)
+        Waves are those of :meth:`PlanOptimizer.parallelize`; every step in a
+        wave is awaited together with ``asyncio.gather`` through
+        :meth:`_run_step_async`, so I/O-bound step handlers overlap and wall
+        time approaches the critical-path bound. A step whose coroutine
+        raises is marked failed without cancelling the rest of its wave,
+        and a step is skipped if any of its dependencies failed or was
+        skipped.
+
+        Args:
+            plan: The plan to execute.
+
+        Returns:
+            Execution summary in the same shape as :meth:`execute`.
+        """
+        start_ns = time.monotonic_ns()
+        steps_completed = 0
+        steps_failed = 0
+        step_log: list[dict[str, object]] = []
+
+        try:
+            graph = self._builder._compile(plan)
+            waves = _wave_positions(graph)
+        except CircularDependencyError as exc:
+            return {
+                "status": "failed",
+                "error": str(exc),
+                "steps": [],
+                "duration_seconds": 0.0,
+            }
+
+        steps = graph.steps
+        blocked = bytearray(len(steps))
+        for wave in waves:
+            runnable = self._runnable_positions(graph, wave, blocked, step_log)
+            results = await asyncio.gather(
+                *(self._run_step_async(steps[idx]) for idx in runnable),
+                return_exceptions=True,
+            )
+            for idx, result in zip(runnable, results, strict=True):
+                if isinstance(result, BaseException):
+                    if not isinstance(result, Exception):
+                        raise result  # cancellation or interpreter exit
+                    steps_failed += 1
+                    self._record_failure(steps[idx], idx, result, blocked, step_log)
+                else:
+                    steps_completed += 1
+                    step_log.append(result)
+
+        total_ns = time.monotonic_ns() - start_ns
+        all_completed = steps_completed == len(plan.steps)
         plan.status = "completed" if all_completed else "failed"
 
         return {
             "plan_id": plan.plan_id,
             "status": plan.status,
-            "steps_completed": len(completed_ids),
-            "steps_failed": len(failed_ids),
-            "total_duration_seconds": round(total_duration, 4),
+            "steps_completed": steps_completed,
+            "steps_failed": steps_failed,
+            "total_duration_seconds": _ns_to_seconds(total_ns),
             "steps": step_log,
         }
 
+    async def _run_step_async(self, step: PlanStep) -> dict[str, object]:
+        """Run a single step for :meth:`execute_async` and return its log entry.
+
+        Override this to await a real handler; raise to mark the step failed.
+        """
+        step.status = "running"
+        step_start_ns = time.monotonic_ns()
+
+        # Simulate execution (in production this would await a real handler)
+        await asyncio.sleep(0)
+        step.status = "completed"
+        step_ns = time.monotonic_ns() - step_start_ns
+
+        return {
+            "step_id": step.step_id,
+            "action": step.action,
+            "status": "completed",
+            "duration_seconds": _ns_to_seconds(step_ns),
+        }
+
     def get_ready_steps(self, plan: Plan) -> list[PlanStep]:
         """Return steps whose dependencies are all completed.
 
@@ -331,34 +748,50 @@ class PlanOptimizer:
         Raises:
             CircularDependencyError: If the plan has circular dependencies.
         """
-        sorted_steps = self._builder.topological_sort(plan)
-        step_to_wave: dict[str, int] = {}
-
-        for step in sorted_steps:
-            if not step.dependencies:
-                step_to_wave[step.step_id] = 0
-            else:
-                max_dep_wave = max(
-                    step_to_wave.get(dep_id, 0)
-                    for dep_id in step.dependencies
-                )
-                step_to_wave[step.step_id] = max_dep_wave + 1
+        steps = plan.steps
+        return [
+            [steps[idx] for idx in wave]
+            for wave in _wave_positions(self._builder._compile(plan))
+        ]
 
-        if not step_to_wave:
-            return []
+    def analyze(self, plan: Plan) -> PlanAnalysis:
+        """Compute parallel waves and the critical path from one Kahn sweep.
 
-        max_wave = max(step_to_wave.values())
-        waves: list[list[PlanStep]] = [[] for _ in range(max_wave + 1)]
-        step_map = {step.step_id: step for step in plan.steps}
+        The waves are those of :meth:`parallelize` and the critical path is
+        the one :meth:`DependencyResolver.critical_path` reports; both come
+        from a single compiled graph and topological order.
 
-        for step_id, wave_idx in step_to_wave.items():
-            waves[wave_idx].append(step_map[step_id])
+        Args:
+            plan: The plan to analyse.
 
-        # Within each wave, sort by priority (ascending = higher priority first)
-        for wave in waves:
-            wave.sort(key=lambda s: s.priority)
+        Returns:
+            PlanAnalysis with priority-sorted waves, per-wave durations and
+            the critical path.
 
-        return waves
+        Raises:
+            CircularDependencyError: If the plan has circular dependencies.
+        """
+        graph = self._builder._compile(plan)
+        order, wave_of = graph.kahn_levels()
+        _check_sorted(len(order), len(graph.steps))
+        if not order:
+            return PlanAnalysis()
+
+        steps = plan.steps
+        durations = graph.durations
+        wave_positions = _group_waves(graph, order, wave_of)
+        finish, predecessor = _longest_paths(graph, order)
+        path = _critical_path(graph, order, finish, predecessor)
+
+        return PlanAnalysis(
+            waves=[[steps[idx] for idx in wave] for wave in wave_positions],
+            wave_durations=[
+                max((durations[idx] for idx in wave), default=0.0)
+                for wave in wave_positions
+            ],
+            critical_path=[steps[idx].step_id for idx in path],
+            critical_path_duration=finish[path[-1]],
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -369,6 +802,9 @@ class PlanOptimizer:
 class DependencyResolver:
     """Resolve step dependencies, detect cycles, and find the critical path.
 
+    The dependency graph is compiled once in the constructor; share one
+    resolver between callers rather than rebuilding it for the same steps.
+
     Example::
 
         resolver = DependencyResolver(plan.steps)
@@ -378,6 +814,26 @@ class DependencyResolver:
 
     def __init__(self, steps: list[PlanStep]) -> None:
         self._steps: dict[str, PlanStep] = {step.step_id: step for step in steps}
+        self._graph = CompiledSteps(list(self._steps.values()))
+        self._kahn_order: list[int] | None = None
+        self._cycles_cache: list[list[str]] | None = None
+
+    def _order(self) -> list[int]:
+        """Return step positions in dependency order, raising on cycles.
+
+        The graph is fixed at construction, so the order is computed once and
+        shared by topological_sort, critical_path and total_duration_seconds.
+        """
+        if self._kahn_order is None:
+            self._kahn_order = self._graph.kahn_order()
+        order = self._kahn_order
+        if len(order) != len(self._graph.steps):
+            sorted_ids = {self._graph.steps[idx].step_id for idx in order}
+            raise CircularDependencyError(
+                f"Circular dependency detected. Could not order: "
+                f"{set(self._steps) - sorted_ids}"
+            )
+        return order
 
     def topological_sort(self) -> list[PlanStep]:
         """Return steps in dependency order (Kahn's algorithm).
@@ -385,115 +841,155 @@ class DependencyResolver:
         Raises:
             CircularDependencyError: If cycles exist.
         """
-        in_degree: dict[str, int] = {sid: 0 for sid in self._steps}
-        adjacency: dict[str, list[str]] = {sid: [] for sid in self._steps}
+        steps = self._graph.steps
+        return [steps[idx] for idx in self._order()]
 
-        for step in self._steps.values():
-            for dep_id in step.dependencies:
-                if dep_id in self._steps:
-                    adjacency[dep_id].append(step.step_id)
-                    in_degree[step.step_id] += 1
+    def detect_cycles(self) -> list[list[str]]:
+        """Return list of cycles (each as list of step_ids), empty if none.
 
-        queue: deque[str] = deque(
-            sid for sid, deg in in_degree.items() if deg == 0
-        )
-        sorted_ids: list[str] = []
+        Runs an iterative Tarjan's SCC pass, so deep chains cannot hit the
+        recursion limit, and reports one cycle per strongly connected
+        component (or self-loop). Each cycle follows dependency edges, starts
+        and ends at the component's smallest step_id, and is the shortest
+        such loop; cycles are ordered by that step_id.
 
-        while queue:
-            current = queue.popleft()
-            sorted_ids.append(current)
-            for neighbor in adjacency[current]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
-
-        if len(sorted_ids) != len(self._steps):
-            raise CircularDependencyError(
-                f"Circular dependency detected. Could not order: "
-                f"{set(self._steps) - set(sorted_ids)}"
-            )
+        The result is cached. Kahn's algorithm runs first, sharing its order
+        with the other queries; if it places every step there are no cycles,
+        otherwise the Tarjan pass only visits the steps it left out.
+        """
+        if self._cycles_cache is None:
+            if self._kahn_order is None:
+                self._kahn_order = self._graph.kahn_order()
+            order = self._kahn_order
+            if len(order) == len(self._graph.steps):
+                self._cycles_cache = []
+            else:
+                self._cycles_cache = self._find_cycles(order)
+        return [list(cycle) for cycle in self._cycles_cache]
 
-        return [self._steps[sid] for sid in sorted_ids]
+    def _find_cycles(self, order: list[int]) -> list[list[str]]:
+        """Run the Tarjan pass behind :meth:`detect_cycles`.
 
-    def detect_cycles(self) -> list[list[str]]:
-        """Return list of cycles (each as list of step_ids), empty if none."""
-        visited: set[str] = set()
-        rec_stack: set[str] = set()
+        Steps in ``order`` were placed by Kahn's algorithm, so none of them
+        is on a cycle. They start out visited and never enter the stack,
+        which leaves the pass to walk only the steps on or behind a cycle.
+        """
+        graph = self._graph
+        preds = graph.preds
+        num_steps = len(graph.steps)
+        index = [-1] * num_steps
+        for idx in order:
+            index[idx] = num_steps
+        lowlink = [0] * num_steps
+        on_stack = bytearray(num_steps)
+        scc_stack: list[int] = []
         cycles: list[list[str]] = []
+        counter = 0
 
-        def dfs(node: str, path: list[str]) -> None:
-            visited.add(node)
-            rec_stack.add(node)
-            path.append(node)
-            step = self._steps.get(node)
-            if step:
-                for dep in step.dependencies:
-                    if dep not in self._steps:
-                        continue
-                    if dep not in visited:
-                        dfs(dep, path)
-                    elif dep in rec_stack:
-                        start = path.index(dep)
-                        cycles.append(path[start:] + [dep])
-            rec_stack.discard(node)
-            path.pop()
-
-        for sid in self._steps:
-            if sid not in visited:
-                dfs(sid, [])
-
+        for root in range(num_steps):
+            if index[root] != -1:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            scc_stack.append(root)
+            on_stack[root] = 1
+            # Each frame is (node, position of its next unvisited dependency)
+            work: list[tuple[int, int]] = [(root, 0)]
+
+            while work:
+                node, pos = work[-1]
+                if pos < len(preds[node]):
+                    work[-1] = (node, pos + 1)
+                    dep = preds[node][pos]
+                    if index[dep] == -1:
+                        index[dep] = lowlink[dep] = counter
+                        counter += 1
+                        scc_stack.append(dep)
+                        on_stack[dep] = 1
+                        work.append((dep, 0))
+                    elif on_stack[dep] and index[dep] < lowlink[node]:
+                        lowlink[node] = index[dep]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] != index[node]:
+                    continue
+
+                members: list[int] = []
+                while True:
+                    member = scc_stack.pop()
+                    on_stack[member] = 0
+                    members.append(member)
+                    if member == node:
+                        break
+                if len(members) > 1 or node in preds[node]:
+                    cycles.append(self._shortest_cycle(members))
+
+        cycles.sort(key=lambda cycle: cycle[0])
         return cycles
 
+    def _shortest_cycle(self, members: list[int]) -> list[str]:
+        """Return the shortest closed cycle through a component's smallest id.
+
+        Breadth-first search from that step along dependency edges, staying
+        inside ``members``, until an edge leads back to it.
+        """
+        graph = self._graph
+        preds = graph.preds
+        steps = graph.steps
+        start = min(members, key=lambda idx: steps[idx].step_id)
+        in_component = set(members)
+        parent: dict[int, int] = {start: -1}
+        queue: deque[int] = deque([start])
+
+        while queue:
+            node = queue.popleft()
+            for dep in preds[node]:
+                if dep == start:
+                    path = [node]
+                    while parent[path[-1]] != -1:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return [steps[idx].step_id for idx in path] + [steps[start].step_id]
+                if dep in in_component and dep not in parent:
+                    parent[dep] = node
+                    queue.append(dep)
+
+        raise AssertionError("strongly connected component without a cycle")
+
     def critical_path(self) -> list[str]:
         """Compute the critical path (longest duration path) through the DAG.
 
         Raises:
             CircularDependencyError: If cycles exist.
         """
-        sorted_steps = self.topological_sort()
-        earliest_start: dict[str, float] = {s.step_id: 0.0 for s in sorted_steps}
-        predecessor: dict[str, str | None] = {s.step_id: None for s in sorted_steps}
-
-        for step in sorted_steps:
-            deps_in_plan = [d for d in step.dependencies if d in self._steps]
-            if deps_in_plan:
-                max_finish = max(
-                    earliest_start[d] + self._steps[d].estimated_duration_seconds
-                    for d in deps_in_plan
-                )
-                if max_finish > earliest_start[step.step_id]:
-                    earliest_start[step.step_id] = max_finish
-                    predecessor[step.step_id] = max(
-                        deps_in_plan,
-                        key=lambda d: earliest_start[d] + self._steps[d].estimated_duration_seconds,
-                    )
-
-        if not sorted_steps:
-            return []
-
-        end = max(
-            sorted_steps,
-            key=lambda s: earliest_start[s.step_id] + s.estimated_duration_seconds,
-        )
-        path: list[str] = []
-        current: str | None = end.step_id
-        while current is not None:
-            path.append(current)
-            current = predecessor[current]
-        path.reverse()
-        return path
+        order = self._order()
+        finish, predecessor = _longest_paths(self._graph, order)
+        steps = self._graph.steps
+        return [
+            steps[idx].step_id
+            for idx in _critical_path(self._graph, order, finish, predecessor)
+        ]
 
     def total_duration_seconds(self) -> float:
-        """Return critical-path duration in seconds."""
+        """Return critical-path duration in seconds.
+
+        This is the largest finish time from the longest-path DP, so the path
+        itself is never reconstructed. On a chain every step is on the
+        critical path and the DP is skipped. Returns ``0.0`` if cycles exist.
+        """
+        if self._graph.is_chain:
+            return sum(self._graph.durations)
         try:
-            path = self.critical_path()
+            order = self._order()
         except CircularDependencyError:
             return 0.0
-        return sum(
-            self._steps[sid].estimated_duration_seconds
-            for sid in path
-            if sid in self._steps
-        )
+        finish, _ = _longest_paths(self._graph, order)
+        return max(finish, default=0.0)
 
 
 # ---------------------------------------------------------------------------
@@ -508,8 +1004,18 @@ class PlanGenerator:
 
         generator = PlanGenerator()
         plan = generator.generate([goal1, goal2])
+
+    Args:
+        cache_size: Number of distinct goal sets whose decomposition is
+            memoized, evicting the least recently used. ``0`` disables it.
     """
 
+    def __init__(self, cache_size: int = 128) -> None:
+        self._cache_size = cache_size
+        self._cache: OrderedDict[
+            tuple[tuple[str, str, int], ...], tuple[list[PlanStep], float, float]
+        ] = OrderedDict()
+
     def generate(
         self,
         goals: list[Goal],
@@ -527,22 +1033,12 @@ class PlanGenerator:
         if not goals:
             raise ValueError("At least one goal is required.")
 
-        plan_id = str(uuid.uuid4())
+        plan_id = fast_uuid()
         name = plan_name or f"Plan for {goals[0].description[:40]}"
         primary_goal = "; ".join(g.description for g in goals)
         sorted_goals = sorted(goals, key=lambda g: g.priority, reverse=True)
 
-        all_steps: list[PlanStep] = []
-        previous_ids: list[str] = []
-
-        for idx, goal in enumerate(sorted_goals):
-            steps = self._decompose_goal(goal, idx, previous_ids)
-            all_steps.extend(steps)
-            previous_ids = [s.step_id for s in steps]
-
-        resolver = DependencyResolver(all_steps)
-        duration = resolver.total_duration_seconds()
-        cost = sum(s.estimated_duration_seconds * 0.01 for s in all_steps)
+        all_steps, duration, cost = self._expand(sorted_goals)
 
         return Plan(
             plan_id=plan_id,
@@ -555,20 +1051,71 @@ class PlanGenerator:
             estimated_duration_seconds=round(duration, 2),
         )
 
+    def _expand(self, sorted_goals: list[Goal]) -> tuple[list[PlanStep], float, float]:
+        """Return fresh steps, duration and cost for ``sorted_goals``.
+
+        The decomposition is memoized on the goals' id, description and
+        priority. Callers always get copies with their own lists, so mutating
+        a generated plan (e.g. by executing it) never leaks into the cache.
+        """
+        key = tuple((g.goal_id, g.description, g.priority) for g in sorted_goals)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        else:
+            all_steps: list[PlanStep] = []
+            previous_ids: list[str] = []
+
+            for idx, goal in enumerate(sorted_goals):
+                steps = self._decompose_goal(goal, idx, previous_ids)
+                all_steps.extend(steps)
+                previous_ids = [s.step_id for s in steps]
+
+            # Each goal's gather step waits on the whole previous goal and
+            # gather -> act -> verify, so the steps form a single chain: the
+            # critical path is every step, with no graph walk needed.
+            durations = [s.estimated_duration_seconds for s in all_steps]
+            duration = sum(durations)
+            cost = sum(d * 0.01 for d in durations)
+            cached = (all_steps, duration, cost)
+
+            if self._cache_size > 0:
+                self._cache[key] = cached
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        template, duration, cost = cached
+        steps = [
+            step.model_copy(
+                update={
+                    "preconditions": list(step.preconditions),
+                    "effects": list(step.effects),
+                    "dependencies": list(step.dependencies),
+                    "metadata": dict(step.metadata),
+                }
+            )
+            for step in template
+        ]
+        return steps, duration, cost
+
     def _decompose_goal(
         self,
         goal: Goal,
         goal_index: int,
         previous_step_ids: list[str],
     ) -> list[PlanStep]:
-        """Decompose a single goal into gather / act / verify steps."""
+        """Decompose a single goal into gather / act / verify steps.
+
+        The goal is already validated and every other value is a constant, so
+        the steps skip pydantic validation.
+        """
         prefix = f"g{goal_index}"
         gather_id = f"{prefix}_gather"
         act_id = f"{prefix}_act"
         verify_id = f"{prefix}_verify"
 
         return [
-            PlanStep(
+            PlanStep.construct_trusted(
                 step_id=gather_id,
                 action=f"Gather information for: {goal.description}",
                 preconditions=[],
@@ -577,7 +1124,7 @@ class PlanGenerator:
                 estimated_duration_seconds=30.0,
                 priority=goal.priority,
             ),
-            PlanStep(
+            PlanStep.construct_trusted(
                 step_id=act_id,
                 action=f"Execute action to achieve: {goal.description}",
                 preconditions=[f"info_ready_{goal_index}"],
@@ -586,7 +1133,7 @@ class PlanGenerator:
                 estimated_duration_seconds=60.0,
                 priority=goal.priority,
             ),
-            PlanStep(
+            PlanStep.construct_trusted(
                 step_id=verify_id,
                 action=f"Verify outcome of: {goal.description}",
                 preconditions=[f"action_done_{goal_index}"],
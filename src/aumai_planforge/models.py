@@ -8,9 +8,10 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Literal
+from functools import cached_property
+from typing import Any, Literal, Self
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 __all__ = [
     "PlanStatus",
@@ -19,6 +20,7 @@ __all__ = [
     "Plan",
     "ExecutionState",
     "PlanValidation",
+    "PlanAnalysis",
 ]
 
 
@@ -32,9 +34,13 @@ class PlanStatus(str, Enum):
 
 
 class Goal(BaseModel):
-    """A high-level objective to be achieved by a plan."""
+    """A high-level objective to be achieved by a plan.
 
-    model_config = ConfigDict(str_strip_whitespace=True)
+    Goals are immutable value objects so they can be shared between plans;
+    use ``model_copy(update=...)`` to derive a modified goal.
+    """
+
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
 
     goal_id: str = Field(description="Unique goal identifier.")
     description: str = Field(description="Natural language description of the goal.")
@@ -73,6 +79,23 @@ class PlanStep(BaseModel):
     status: Literal["pending", "running", "completed", "failed", "skipped"] = "pending"
     metadata: dict[str, object] = Field(default_factory=dict)
 
+    @field_validator("dependencies", mode="after")
+    @classmethod
+    def _dedupe_dependencies(cls, dependencies: list[str]) -> list[str]:
+        """Drop repeated dependency ids, keeping the first occurrence."""
+        return list(dict.fromkeys(dependencies))
+
+    @classmethod
+    def construct_trusted(cls, **data: object) -> Self:
+        """Build a step from already-valid data without running validation.
+
+        Only for steps assembled internally from validated inputs: strings
+        are not stripped and field constraints are not checked. Omitted
+        fields get their defaults. User or file input must go through the
+        normal constructor.
+        """
+        return cls.model_construct(None, **data)
+
 
 class Plan(BaseModel):
     """A structured plan composed of steps with dependency links."""
@@ -90,6 +113,28 @@ class Plan(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(tz=timezone.utc))
     metadata: dict[str, object] = Field(default_factory=dict)
 
+    @cached_property
+    def step_index(self) -> dict[str, PlanStep]:
+        """Map of step_id to step, built lazily and cached.
+
+        ``PlanBuilder.add_step`` keeps the cache current; code that mutates
+        ``steps`` directly must drop it with ``plan.__dict__.pop("step_index", None)``.
+        """
+        return {step.step_id: step for step in self.steps}
+
+    # ``step_index`` lives in the instance ``__dict__`` next to the fields, so
+    # pydantic's copies would carry it over even when ``model_copy(update=...)``
+    # replaces ``steps``. Copies start without it and rebuild it on first use.
+    def __copy__(self) -> Self:
+        copied = super().__copy__()
+        copied.__dict__.pop("step_index", None)
+        return copied
+
+    def __deepcopy__(self, memo: dict[int, Any] | None = None) -> Self:
+        copied = super().__deepcopy__(memo)
+        copied.__dict__.pop("step_index", None)
+        return copied
+
 
 class ExecutionState(BaseModel):
     """Tracks the runtime state of plan execution."""
@@ -104,12 +149,42 @@ class ExecutionState(BaseModel):
 
 
 class PlanValidation(BaseModel):
-    """Result of validating a plan's structure."""
+    """Result of validating a plan's structure (immutable)."""
+
+    model_config = ConfigDict(frozen=True)
 
     plan: Plan
     valid: bool
     issues: list[str] = Field(default_factory=list)
+    issue_tags: frozenset[str] = Field(
+        default_factory=frozenset,
+        description=(
+            "Kinds of issue found: 'duplicate-id', 'missing-dep', 'circular-dep'."
+        ),
+    )
     estimated_total_duration: float = Field(
         ge=0.0, default=0.0,
         description="Estimated critical-path duration in seconds.",
     )
+
+
+class PlanAnalysis(BaseModel):
+    """Parallel waves and critical path computed in a single pass over a plan."""
+
+    waves: list[list[PlanStep]] = Field(
+        default_factory=list,
+        description="Steps grouped into waves that can execute concurrently.",
+    )
+    wave_durations: list[float] = Field(
+        default_factory=list,
+        description="Longest step duration in each wave, aligned with waves.",
+    )
+    critical_path: list[str] = Field(
+        default_factory=list,
+        description="step_ids along the longest-duration dependency chain.",
+    )
+    critical_path_duration: float = Field(
+        ge=0.0,
+        default=0.0,
+        description="Total duration of the critical path in seconds.",
+    )
@@ -2,14 +2,37 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 import pytest
+import yaml
+from click.testing import CliRunner, Result
 
-from aumai_planforge.core import PlanBuilder, PlanExecutor, PlanOptimizer
+from aumai_planforge.cli import main
+from aumai_planforge.core import (
+    DependencyResolver,
+    PlanBuilder,
+    PlanExecutor,
+    PlanGenerator,
+    PlanOptimizer,
+)
 from aumai_planforge.models import Goal, Plan, PlanStep
 
 
+def pytest_configure(config: pytest.Config) -> None:
+    """On CI, refuse to run against a PyYAML built without libyaml.
+
+    Plan files are read and written through the C-accelerated
+    CSafeLoader/CSafeDumper; a pure-Python fallback would pass silently but
+    slowly, so make it a hard failure where the build is under our control.
+    """
+    if os.environ.get("CI") and not getattr(yaml, "__with_libyaml__", False):
+        raise pytest.UsageError(
+            "PyYAML was built without libyaml; CSafeLoader/CSafeDumper are unavailable."
+        )
+
+
 @pytest.fixture()
 def builder() -> PlanBuilder:
     """Return a PlanBuilder instance."""
@@ -28,15 +51,36 @@ def optimizer(builder: PlanBuilder) -> PlanOptimizer:
     return PlanOptimizer(builder=builder)
 
 
-@pytest.fixture()
-def simple_plan(builder: PlanBuilder) -> Plan:
-    """Return a plan with two sequential steps (A -> B)."""
+@pytest.fixture(scope="module")
+def gen() -> PlanGenerator:
+    """Return a PlanGenerator shared by the module.
+
+    Its decomposition cache only ever hands out copies, so tests cannot see
+    each other's plans through it.
+    """
+    return PlanGenerator()
+
+
+@pytest.fixture(scope="session")
+def simple_plan_template() -> Plan:
+    """Return a plan with two sequential steps (A -> B), built once.
+
+    Shared by the whole session: only tests that leave the plan untouched
+    may use it directly, everything else takes ``simple_plan``.
+    """
+    builder = PlanBuilder()
     plan = builder.create(name="simple-plan", goal="Achieve simple goal")
     step_a = builder.add_step(plan, action="Step A", dependencies=[], duration=10.0, priority=1)
     builder.add_step(plan, action="Step B", dependencies=[step_a.step_id], duration=20.0, priority=2)
     return plan
 
 
+@pytest.fixture()
+def simple_plan(simple_plan_template: Plan) -> Plan:
+    """Return a private deep copy of ``simple_plan_template`` to mutate freely."""
+    return simple_plan_template.model_copy(deep=True)
+
+
 @pytest.fixture()
 def parallel_plan(builder: PlanBuilder) -> Plan:
     """Return a plan where steps B and C can run in parallel after A."""
@@ -47,6 +91,50 @@ def parallel_plan(builder: PlanBuilder) -> Plan:
     return plan
 
 
+# Steps are shared per module and must not be mutated; tests that change a
+# step's fields take ``model_copy()`` of it first.
+
+
+@pytest.fixture(scope="module")
+def step_a_no_deps() -> PlanStep:
+    """Return step ``a`` (5s) with no dependencies."""
+    return PlanStep(
+        step_id="a", action="A", dependencies=[], estimated_duration_seconds=5.0
+    )
+
+
+@pytest.fixture(scope="module")
+def step_b_dep_a() -> PlanStep:
+    """Return step ``b`` (10s) depending on ``a``."""
+    return PlanStep(
+        step_id="b", action="B", dependencies=["a"], estimated_duration_seconds=10.0
+    )
+
+
+@pytest.fixture(scope="module")
+def step_a_cycle() -> PlanStep:
+    """Return step ``a`` depending on ``b``; pair with ``step_b_cycle``."""
+    return PlanStep(step_id="a", action="A", dependencies=["b"])
+
+
+@pytest.fixture(scope="module")
+def step_b_cycle() -> PlanStep:
+    """Return step ``b`` depending on ``a``; pair with ``step_a_cycle``."""
+    return PlanStep(step_id="b", action="B", dependencies=["a"])
+
+
+@pytest.fixture(scope="module")
+def cyclic_resolver(
+    step_a_cycle: PlanStep, step_b_cycle: PlanStep
+) -> DependencyResolver:
+    """Return a resolver over the ``a <-> b`` cycle, shared by the module.
+
+    Its queries are read-only; the only state it keeps is the memoized
+    cycle list, which every caller would compute identically.
+    """
+    return DependencyResolver([step_a_cycle, step_b_cycle])
+
+
 @pytest.fixture()
 def goal_a() -> Goal:
     """Return a high-priority goal."""
@@ -68,8 +156,142 @@ def goal_b() -> Goal:
 
 
 @pytest.fixture()
-def saved_plan_file(builder: PlanBuilder, simple_plan: Plan, tmp_path: Path) -> Path:
-    """Save a plan to a YAML file and return the path."""
-    file = tmp_path / "plan.yaml"
-    builder.save(simple_plan, str(file))
+def saved_plan_file(
+    builder: PlanBuilder, simple_plan_template: Plan, tmp_path: Path
+) -> Path:
+    """Save a plan to a JSON file and return the path."""
+    file = tmp_path / "plan.json"
+    builder.save(simple_plan_template, str(file))
     return file
+
+
+def _write_yaml_plan(file: Path, plan: Plan) -> Path:
+    """Dump ``plan`` to ``file`` as YAML, the way a user would hand it over."""
+    file.write_bytes(
+        yaml.dump(
+            plan.model_dump(mode="json"),
+            Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+            encoding="utf-8",
+        )
+    )
+    return file
+
+
+@pytest.fixture(scope="session")
+def cli_plan_model() -> Plan:
+    """Return the minimal valid two-step plan behind ``simple_plan_file``."""
+    return Plan(
+        plan_id="plan-cli-001",
+        name="CLI Test Plan",
+        goal="Test the CLI",
+        steps=[
+            PlanStep(
+                step_id="step-1",
+                action="Gather information",
+                estimated_duration_seconds=10.0,
+                priority=1,
+            ),
+            PlanStep(
+                step_id="step-2",
+                action="Execute action",
+                dependencies=["step-1"],
+                estimated_duration_seconds=20.0,
+                priority=2,
+            ),
+        ],
+        estimated_cost=0.3,
+        estimated_duration_seconds=30.0,
+    )
+
+
+@pytest.fixture(scope="session")
+def circular_plan_model() -> Plan:
+    """Return a two-step plan whose steps depend on each other."""
+    return Plan(
+        plan_id="plan-circular",
+        name="Circular Plan",
+        goal="Circular goal",
+        steps=[
+            PlanStep(
+                step_id="a",
+                action="Step A",
+                dependencies=["b"],
+                estimated_duration_seconds=5.0,
+                priority=1,
+            ),
+            PlanStep(
+                step_id="b",
+                action="Step B",
+                dependencies=["a"],
+                estimated_duration_seconds=5.0,
+                priority=2,
+            ),
+        ],
+    )
+
+
+@pytest.fixture(scope="session")
+def simple_plan_file(
+    tmp_path_factory: pytest.TempPathFactory, cli_plan_model: Plan
+) -> Path:
+    """Create a minimal valid plan YAML file, shared read-only by the session."""
+    return _write_yaml_plan(
+        tmp_path_factory.mktemp("plans") / "plan.yaml", cli_plan_model
+    )
+
+
+@pytest.fixture(scope="session")
+def circular_plan_file(
+    tmp_path_factory: pytest.TempPathFactory, circular_plan_model: Plan
+) -> Path:
+    """Create a plan YAML file with circular dependencies, shared read-only."""
+    return _write_yaml_plan(
+        tmp_path_factory.mktemp("plans") / "circular.yaml", circular_plan_model
+    )
+
+
+@pytest.fixture(scope="session")
+def simple_plan_from_disk(simple_plan_file: Path) -> Plan:
+    """Return ``simple_plan_file`` loaded once; deep-copy it before executing."""
+    return PlanBuilder().load(str(simple_plan_file))
+
+
+@pytest.fixture(scope="session")
+def runner() -> CliRunner:
+    """Return a Click test runner shared by the whole session."""
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def cli_outputs(runner: CliRunner) -> dict[str, Result]:
+    """Return the results of the argument-free invocations, run once."""
+    return {
+        "version": runner.invoke(main, ["--version"]),
+        "help": runner.invoke(main, ["--help"]),
+    }
+
+
+@pytest.fixture(scope="session")
+def create_result(runner: CliRunner) -> Result:
+    """Return the result of one ``create`` run without ``--output``."""
+    return runner.invoke(
+        main, ["create", "--name", "Alpha Plan", "--goal", "My Specific Goal"]
+    )
+
+
+@pytest.fixture(scope="session")
+def validate_result(runner: CliRunner, simple_plan_file: Path) -> Result:
+    """Return the result of one ``validate`` run on ``simple_plan_file``."""
+    return runner.invoke(main, ["validate", "--plan", str(simple_plan_file)])
+
+
+@pytest.fixture(scope="session")
+def optimize_result(runner: CliRunner, simple_plan_file: Path) -> Result:
+    """Return the result of one ``optimize`` run on ``simple_plan_file``."""
+    return runner.invoke(main, ["optimize", "--plan", str(simple_plan_file)])
+
+
+@pytest.fixture(scope="session")
+def run_result(runner: CliRunner, simple_plan_file: Path) -> Result:
+    """Return the result of one ``run`` on ``simple_plan_file``."""
+    return runner.invoke(main, ["run", "--plan", str(simple_plan_file)])
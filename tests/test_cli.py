@@ -2,144 +2,76 @@
 
 from __future__ import annotations
 
+import subprocess
+import sys
 from pathlib import Path
 
+import click
 import pytest
-import yaml
-from click.testing import CliRunner
-
-from aumai_planforge.cli import main
-
-
-@pytest.fixture()
-def runner() -> CliRunner:
-    """Return a Click test runner."""
-    return CliRunner()
-
-
-@pytest.fixture()
-def simple_plan_file(tmp_path: Path) -> Path:
-    """Create a minimal valid plan YAML file."""
-    plan_data = {
-        "plan_id": "plan-cli-001",
-        "name": "CLI Test Plan",
-        "goal": "Test the CLI",
-        "steps": [
-            {
-                "step_id": "step-1",
-                "action": "Gather information",
-                "dependencies": [],
-                "estimated_duration_seconds": 10.0,
-                "priority": 1,
-                "preconditions": [],
-                "effects": [],
-                "status": "pending",
-                "metadata": {},
-            },
-            {
-                "step_id": "step-2",
-                "action": "Execute action",
-                "dependencies": ["step-1"],
-                "estimated_duration_seconds": 20.0,
-                "priority": 2,
-                "preconditions": [],
-                "effects": [],
-                "status": "pending",
-                "metadata": {},
-            },
-        ],
-        "status": "draft",
-        "estimated_cost": 0.3,
-        "estimated_duration_seconds": 30.0,
-        "goals": [],
-        "metadata": {},
-    }
-    file = tmp_path / "plan.yaml"
-    file.write_text(yaml.dump(plan_data), encoding="utf-8")
-    return file
-
-
-@pytest.fixture()
-def circular_plan_file(tmp_path: Path) -> Path:
-    """Create a plan YAML file with circular dependencies."""
-    plan_data = {
-        "plan_id": "plan-circular",
-        "name": "Circular Plan",
-        "goal": "Circular goal",
-        "steps": [
-            {
-                "step_id": "a",
-                "action": "Step A",
-                "dependencies": ["b"],
-                "estimated_duration_seconds": 5.0,
-                "priority": 1,
-                "preconditions": [],
-                "effects": [],
-                "status": "pending",
-                "metadata": {},
-            },
-            {
-                "step_id": "b",
-                "action": "Step B",
-                "dependencies": ["a"],
-                "estimated_duration_seconds": 5.0,
-                "priority": 2,
-                "preconditions": [],
-                "effects": [],
-                "status": "pending",
-                "metadata": {},
-            },
-        ],
-        "status": "draft",
-        "estimated_cost": 0.0,
-        "estimated_duration_seconds": 0.0,
-        "goals": [],
-        "metadata": {},
-    }
-    file = tmp_path / "circular.yaml"
-    file.write_text(yaml.dump(plan_data), encoding="utf-8")
-    return file
+from click.testing import CliRunner, Result
+
+from aumai_planforge.cli import (
+    _do_create,
+    _do_optimize,
+    _do_run,
+    _do_validate,
+    main,
+)
+from aumai_planforge.models import Plan
 
 
 class TestCliVersion:
     """Tests for --version flag."""
 
-    def test_version_flag(self, runner: CliRunner) -> None:
+    def test_version_flag(self, cli_outputs: dict[str, Result]) -> None:
         """--version must exit 0 and report version."""
-        result = runner.invoke(main, ["--version"])
+        result = cli_outputs["version"]
         assert result.exit_code == 0
         assert "0.1.0" in result.output
 
-    def test_help_flag(self, runner: CliRunner) -> None:
+    def test_help_flag(self, cli_outputs: dict[str, Result]) -> None:
         """--help must exit 0 and describe the CLI."""
-        result = runner.invoke(main, ["--help"])
+        result = cli_outputs["help"]
         assert result.exit_code == 0
         assert "PlanForge" in result.output
 
+    def test_import_defers_core(self) -> None:
+        """Importing the CLI must not import the pydantic-backed core module."""
+        code = (
+            "import sys, aumai_planforge.cli; "
+            "sys.exit('aumai_planforge.core' in sys.modules)"
+        )
+        completed = subprocess.run([sys.executable, "-c", code], check=False)  # noqa: S603
+        assert completed.returncode == 0
+
 
 class TestCreateCommand:
     """Tests for the `create` command."""
 
-    def test_create_exits_zero(self, runner: CliRunner) -> None:
+    def test_create_exits_zero(self, create_result: Result) -> None:
         """create exits 0 for valid name and goal."""
-        result = runner.invoke(
-            main, ["create", "--name", "My Plan", "--goal", "Achieve something"]
-        )
-        assert result.exit_code == 0
-
-    def test_create_prints_plan_name(self, runner: CliRunner) -> None:
-        """create prints the plan name."""
-        result = runner.invoke(
-            main, ["create", "--name", "Alpha Plan", "--goal", "Some goal"]
-        )
-        assert "Alpha Plan" in result.output
-
-    def test_create_prints_goal(self, runner: CliRunner) -> None:
-        """create prints the goal."""
-        result = runner.invoke(
-            main, ["create", "--name", "My Plan", "--goal", "My Specific Goal"]
-        )
-        assert "My Specific Goal" in result.output
+        assert create_result.exit_code == 0
+
+    def test_create_prints_report(self, create_result: Result) -> None:
+        """The Click wiring prints the rendered report."""
+        assert create_result.output.startswith("Created plan 'Alpha Plan'")
+
+    def test_do_create_renders_name_and_goal(self) -> None:
+        """_do_create returns the plan and a report naming it and its goal."""
+        plan, report = _do_create("Alpha Plan", "My Specific Goal", None)
+        assert plan.name == "Alpha Plan"
+        assert plan.goal == "My Specific Goal"
+        assert report.splitlines() == [
+            f"Created plan 'Alpha Plan' (ID: {plan.plan_id})",
+            "Goal: My Specific Goal",
+        ]
+
+    def test_do_create_saves_output(self, tmp_path: Path) -> None:
+        """_do_create saves to ``output`` and says so in the report."""
+        output_file = tmp_path / "plan.json"
+        _, report = _do_create("Saved Plan", "Save to disk", output_file)
+        assert output_file.exists()
+        assert report.endswith(f"Plan saved to {output_file}")
 
     def test_create_saves_file(self, runner: CliRunner, tmp_path: Path) -> None:
         """create --output saves the plan to a YAML file."""
@@ -157,55 +89,89 @@ class TestCreateCommand:
         assert output_file.exists()
         assert "saved" in result.output.lower()
 
+    def test_create_saves_json_file(self, runner: CliRunner, tmp_path: Path) -> None:
+        """create --output with a .json path writes a loadable JSON plan."""
+        output_file = tmp_path / "new_plan.json"
+        result = runner.invoke(
+            main,
+            [
+                "create",
+                "--name", "Json Plan",
+                "--goal", "Save as JSON",
+                "--output", str(output_file),
+            ],
+        )
+        assert result.exit_code == 0
+        validate = runner.invoke(main, ["validate", "--plan", str(output_file)])
+        assert validate.exit_code == 0
+
     def test_create_missing_name(self, runner: CliRunner) -> None:
-        """create exits non-zero when --name is missing."""
-        result = runner.invoke(main, ["create", "--goal", "No name"])
+        """create rejects a missing --name."""
+        result = runner.invoke(
+            main, ["create", "--goal", "No name"], standalone_mode=False
+        )
+        assert isinstance(result.exception, click.MissingParameter)
         assert result.exit_code != 0
 
     def test_create_missing_goal(self, runner: CliRunner) -> None:
-        """create exits non-zero when --goal is missing."""
-        result = runner.invoke(main, ["create", "--name", "No goal"])
+        """create rejects a missing --goal."""
+        result = runner.invoke(
+            main, ["create", "--name", "No goal"], standalone_mode=False
+        )
+        assert isinstance(result.exception, click.MissingParameter)
         assert result.exit_code != 0
 
 
-class TestValidateCommand:
-    """Tests for the `validate` command."""
+class TestLoadErrors:
+    """Tests for plan files that exist but cannot be parsed."""
 
-    def test_validate_valid_plan_exits_zero(
-        self, runner: CliRunner, simple_plan_file: Path
+    @pytest.mark.parametrize("command", ["validate", "optimize", "run"])
+    def test_invalid_plan_file_exits_one(
+        self, runner: CliRunner, tmp_path: Path, command: str
     ) -> None:
-        """validate exits 0 for a valid plan."""
-        result = runner.invoke(main, ["validate", "--plan", str(simple_plan_file)])
-        assert result.exit_code == 0
+        """Commands exit 1 with a load error for a malformed plan file."""
+        broken = tmp_path / "broken.yaml"
+        broken.write_text("steps: [unclosed", encoding="utf-8")
+        result = runner.invoke(main, [command, "--plan", str(broken)])
+        assert result.exit_code == 1
+        assert "Failed to load plan" in result.output
 
-    def test_validate_prints_valid_message(
-        self, runner: CliRunner, simple_plan_file: Path
-    ) -> None:
-        """validate prints that the plan is valid."""
-        result = runner.invoke(main, ["validate", "--plan", str(simple_plan_file)])
-        assert "valid" in result.output.lower()
 
-    def test_validate_prints_step_count(
-        self, runner: CliRunner, simple_plan_file: Path
-    ) -> None:
-        """validate prints the number of steps."""
-        result = runner.invoke(main, ["validate", "--plan", str(simple_plan_file)])
-        assert "Steps" in result.output
+class TestValidateCommand:
+    """Tests for the `validate` command."""
 
-    def test_validate_prints_duration(
-        self, runner: CliRunner, simple_plan_file: Path
+    def test_validate_valid_plan_exits_zero(self, validate_result: Result) -> None:
+        """validate exits 0 for a valid plan."""
+        assert validate_result.exit_code == 0
+
+    def test_do_validate_reports_summary(self, simple_plan_from_disk: Plan) -> None:
+        """validate reports validity, the step count and the estimated duration."""
+        result, report = _do_validate(simple_plan_from_disk)
+        assert result.valid is True
+        assert report.splitlines() == [
+            "Plan 'CLI Test Plan' is valid.",
+            "  Steps:               2",
+            "  Estimated duration:  30.0s",
+        ]
+
+    def test_validate_json_plan(
+        self, runner: CliRunner, saved_plan_file: Path
     ) -> None:
-        """validate prints estimated duration."""
-        result = runner.invoke(main, ["validate", "--plan", str(simple_plan_file)])
-        assert "duration" in result.output.lower()
+        """validate reads plans saved as JSON."""
+        result = runner.invoke(main, ["validate", "--plan", str(saved_plan_file)])
+        assert result.exit_code == 0
+        assert "Steps:               2" in result.output
 
     def test_validate_missing_file(
         self, runner: CliRunner, tmp_path: Path
     ) -> None:
-        """validate exits non-zero for a missing plan file."""
+        """validate rejects a missing plan file before loading anything."""
         result = runner.invoke(
-            main, ["validate", "--plan", str(tmp_path / "missing.yaml")]
+            main,
+            ["validate", "--plan", str(tmp_path / "missing.yaml")],
+            standalone_mode=False,
         )
+        assert isinstance(result.exception, click.BadParameter)
         assert result.exit_code != 0
 
     def test_validate_circular_plan_exits_nonzero(
@@ -213,67 +179,71 @@ class TestValidateCommand:
     ) -> None:
         """validate exits non-zero for a plan with circular dependencies."""
         result = runner.invoke(
-            main, ["validate", "--plan", str(circular_plan_file)]
+            main, ["validate", "--plan", str(circular_plan_file)], standalone_mode=False
         )
-        assert result.exit_code != 0
+        assert isinstance(result.exception, SystemExit)
+        assert result.exit_code == 1
 
 
 class TestOptimizeCommand:
     """Tests for the `optimize` command."""
 
-    def test_optimize_valid_plan_exits_zero(
-        self, runner: CliRunner, simple_plan_file: Path
-    ) -> None:
+    def test_optimize_valid_plan_exits_zero(self, optimize_result: Result) -> None:
         """optimize exits 0 for a valid plan."""
-        result = runner.invoke(main, ["optimize", "--plan", str(simple_plan_file)])
-        assert result.exit_code == 0
+        assert optimize_result.exit_code == 0
 
-    def test_optimize_shows_wave_count(
-        self, runner: CliRunner, simple_plan_file: Path
+    def test_do_optimize_reports_waves_and_critical_path(
+        self, simple_plan_from_disk: Plan
     ) -> None:
-        """optimize prints the number of parallel waves."""
-        result = runner.invoke(main, ["optimize", "--plan", str(simple_plan_file)])
-        assert "wave" in result.output.lower()
+        """optimize reports the wave count and the critical path summary."""
+        analysis, report = _do_optimize(simple_plan_from_disk)
+        assert len(analysis.waves) == 2
+        assert report.startswith("Plan 'CLI Test Plan' — 2 parallel wave(s):")
+        assert report.endswith("Critical path: 2 step(s), ~30.0s")
 
     def test_optimize_missing_file(
         self, runner: CliRunner, tmp_path: Path
     ) -> None:
-        """optimize exits non-zero for a missing plan file."""
+        """optimize rejects a missing plan file before loading anything."""
         result = runner.invoke(
-            main, ["optimize", "--plan", str(tmp_path / "missing.yaml")]
+            main,
+            ["optimize", "--plan", str(tmp_path / "missing.yaml")],
+            standalone_mode=False,
         )
+        assert isinstance(result.exception, click.BadParameter)
         assert result.exit_code != 0
 
 
 class TestRunCommand:
     """Tests for the `run` command."""
 
-    def test_run_valid_plan_exits_zero(
-        self, runner: CliRunner, simple_plan_file: Path
-    ) -> None:
+    def test_run_valid_plan_exits_zero(self, run_result: Result) -> None:
         """run exits 0 for a valid plan that completes successfully."""
-        result = runner.invoke(main, ["run", "--plan", str(simple_plan_file)])
-        assert result.exit_code == 0
+        assert run_result.exit_code == 0
 
-    def test_run_prints_status(
-        self, runner: CliRunner, simple_plan_file: Path
-    ) -> None:
-        """run prints execution status."""
-        result = runner.invoke(main, ["run", "--plan", str(simple_plan_file)])
-        assert "Status" in result.output
+    def test_do_run_reports_summary(self, simple_plan_from_disk: Plan) -> None:
+        """run reports the execution status and the number of steps completed."""
+        result, report = _do_run(simple_plan_from_disk.model_copy(deep=True))
+        assert result["status"] == "completed"
+        assert "Status: completed" in report
+        assert "Steps completed: 2" in report
 
-    def test_run_prints_steps_completed(
-        self, runner: CliRunner, simple_plan_file: Path
+    def test_run_circular_plan_reports_error(
+        self, runner: CliRunner, circular_plan_file: Path
     ) -> None:
-        """run prints number of steps completed."""
-        result = runner.invoke(main, ["run", "--plan", str(simple_plan_file)])
-        assert "Steps completed" in result.output
+        """run exits 1 with an error message for a circular plan."""
+        result = runner.invoke(main, ["run", "--plan", str(circular_plan_file)])
+        assert result.exit_code == 1
+        assert "Execution failed" in result.output
 
     def test_run_missing_file(
         self, runner: CliRunner, tmp_path: Path
     ) -> None:
-        """run exits non-zero for a missing plan file."""
+        """run rejects a missing plan file before loading anything."""
         result = runner.invoke(
-            main, ["run", "--plan", str(tmp_path / "missing.yaml")]
+            main,
+            ["run", "--plan", str(tmp_path / "missing.yaml")],
+            standalone_mode=False,
         )
+        assert isinstance(result.exception, click.BadParameter)
         assert result.exit_code != 0
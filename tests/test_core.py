@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
+from typing import Any
 
 import pytest
+from pydantic import ValidationError
 
+from aumai_planforge._ids import fast_uuid
+from aumai_planforge._toposort import CompiledSteps, kahn_sort
 from aumai_planforge.core import (
     CircularDependencyError,
     DependencyResolver,
@@ -13,10 +18,20 @@ from aumai_planforge.core import (
     PlanExecutor,
     PlanGenerator,
     PlanOptimizer,
+    _build_record,
 )
 from aumai_planforge.models import Goal, Plan, PlanStep, PlanValidation
 
 
+def fast_step(**data: Any) -> PlanStep:
+    """Build a known-good test step without running validation.
+
+    Only for hand-written graph fixtures; tests of PlanStep validation itself
+    must use the normal constructor.
+    """
+    return PlanStep.construct_trusted(**data)
+
+
 # ---------------------------------------------------------------------------
 # PlanBuilder tests
 # ---------------------------------------------------------------------------
@@ -56,31 +71,63 @@ class TestPlanBuilder:
         assert isinstance(step, PlanStep)
         assert step.action == "Act"
 
-    def test_add_step_with_dependencies(self, simple_plan: Plan) -> None:
-        """Steps in simple_plan correctly reference each other."""
-        assert len(simple_plan.steps) == 2
-        step_a = simple_plan.steps[0]
-        step_b = simple_plan.steps[1]
+    def test_add_step_refreshes_step_index(self, builder: PlanBuilder) -> None:
+        """add_step() invalidates the cached step_index on the plan."""
+        plan = builder.create(name="index-plan", goal="Goal")
+        first = builder.add_step(plan, action="First", dependencies=[], duration=1.0)
+        assert list(plan.step_index) == [first.step_id]
+        second = builder.add_step(plan, action="Second", dependencies=[], duration=1.0)
+        assert plan.step_index[second.step_id] is second
+
+    @pytest.mark.parametrize("deep", [False, True])
+    def test_model_copy_rebuilds_step_index(
+        self, simple_plan: Plan, deep: bool
+    ) -> None:
+        """Copies never inherit a cached step_index that no longer fits."""
+        assert len(simple_plan.step_index) == 2
+        replacement = fast_step(step_id="only", action="Only")
+        emptied = simple_plan.model_copy(update={"steps": []}, deep=deep)
+        replaced = simple_plan.model_copy(update={"steps": [replacement]}, deep=deep)
+        assert emptied.step_index == {}
+        assert replaced.step_index == {"only": replacement}
+        assert len(simple_plan.step_index) == 2
+
+    def test_add_step_with_dependencies(self, simple_plan_template: Plan) -> None:
+        """Steps in simple_plan_template correctly reference each other."""
+        assert len(simple_plan_template.steps) == 2
+        step_a = simple_plan_template.steps[0]
+        step_b = simple_plan_template.steps[1]
         assert step_a.step_id in step_b.dependencies
 
-    def test_validate_valid_plan(self, simple_plan: Plan, builder: PlanBuilder) -> None:
+    def test_validate_valid_plan(
+        self, simple_plan_template: Plan, builder: PlanBuilder
+    ) -> None:
         """validate() returns valid=True for a correctly constructed plan."""
-        result = builder.validate(simple_plan)
+        result = builder.validate(simple_plan_template)
         assert isinstance(result, PlanValidation)
         assert result.valid is True
         assert result.issues == []
+        assert result.issue_tags == frozenset()
+
+    def test_validation_result_is_frozen(
+        self, simple_plan_template: Plan, builder: PlanBuilder
+    ) -> None:
+        """validate() returns an immutable PlanValidation."""
+        result = builder.validate(simple_plan_template)
+        with pytest.raises(ValidationError):
+            result.valid = False  # type: ignore[misc]
 
     def test_validate_estimates_duration(
-        self, simple_plan: Plan, builder: PlanBuilder
+        self, simple_plan_template: Plan, builder: PlanBuilder
     ) -> None:
         """validate() includes a non-zero duration estimate."""
-        result = builder.validate(simple_plan)
+        result = builder.validate(simple_plan_template)
         assert result.estimated_total_duration > 0.0
 
     def test_validate_detects_missing_dependency(self, builder: PlanBuilder) -> None:
         """validate() reports an issue when a step references a missing dependency."""
         plan = builder.create(name="broken", goal="Goal")
-        step = PlanStep(
+        step = fast_step(
             step_id="orphan",
             action="Act",
             dependencies=["non-existent-step-id"],
@@ -89,21 +136,123 @@ class TestPlanBuilder:
         plan.steps.append(step)
         result = builder.validate(plan)
         assert result.valid is False
+        assert result.issue_tags == {"missing-dep"}
         assert any("non-existent-step-id" in issue for issue in result.issues)
 
+    def test_validate_tags_duplicate_ids(self, builder: PlanBuilder) -> None:
+        """validate() tags duplicate step_ids alongside the issue text."""
+        plan = builder.create(name="dupes", goal="Goal")
+        plan.steps.extend(
+            [
+                fast_step(step_id="same", action="A"),
+                fast_step(step_id="same", action="B"),
+            ]
+        )
+        result = builder.validate(plan)
+        assert result.issue_tags == {"duplicate-id"}
+        assert result.issues == ["Duplicate step_ids detected."]
+
     def test_validate_detects_circular_dependency(
-        self, builder: PlanBuilder
+        self, builder: PlanBuilder, step_a_cycle: PlanStep, step_b_cycle: PlanStep
     ) -> None:
         """validate() reports a circular dependency."""
         plan = builder.create(name="circular", goal="Goal")
-        step_a = PlanStep(step_id="a", action="A", dependencies=["b"])
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"])
-        plan.steps.extend([step_a, step_b])
+        plan.steps.extend([step_a_cycle, step_b_cycle])
         result = builder.validate(plan)
         assert result.valid is False
+        assert "circular-dep" in result.issue_tags
         assert any("circular" in issue.lower() or "cycle" in issue.lower()
                    for issue in result.issues)
 
+    def test_validate_builder_plan_matches_full_check(
+        self, simple_plan_template: Plan, builder: PlanBuilder
+    ) -> None:
+        """validate() fast path agrees with a full check of the same plan."""
+        fast = builder.validate(simple_plan_template)
+        # A plan rebuilt from its data carries no builder record
+        full = builder.validate(
+            Plan.model_validate(simple_plan_template.model_dump())
+        )
+        assert fast.valid is full.valid is True
+        assert fast.estimated_total_duration == full.estimated_total_duration == 30.0
+
+    def test_validate_after_direct_mutation(
+        self, simple_plan: Plan, builder: PlanBuilder
+    ) -> None:
+        """validate() re-checks a builder plan whose steps were edited directly."""
+        simple_plan.steps.append(
+            fast_step(step_id="stray", action="Stray", dependencies=["missing"])
+        )
+        result = builder.validate(simple_plan)
+        assert result.valid is False
+
+    def test_validate_after_in_place_dependency_edit(
+        self, builder: PlanBuilder
+    ) -> None:
+        """validate() notices dependencies edited on a builder plan's steps."""
+        plan = builder.create(name="edited", goal="Goal")
+        step_a = builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        step_b = builder.add_step(
+            plan, "B", dependencies=[step_a.step_id], duration=1.0
+        )
+        step_b.dependencies.append("ghost")
+        assert builder.validate(plan).issue_tags == {"missing-dep"}
+        step_b.dependencies.remove("ghost")
+        step_a.dependencies.append(step_b.step_id)
+        assert builder.validate(plan).issue_tags == {"circular-dep"}
+
+    def test_validate_after_step_replacement(self, builder: PlanBuilder) -> None:
+        """validate() notices a step replaced in place on a builder plan."""
+        plan = builder.create(name="replaced", goal="Goal")
+        builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        plan.steps[0] = fast_step(
+            step_id="replacement", action="R", dependencies=["nope"]
+        )
+        result = builder.validate(plan)
+        assert result.valid is False
+        assert result.issue_tags == {"missing-dep"}
+
+    def test_validate_fast_path_tracks_duration_edits(
+        self, builder: PlanBuilder
+    ) -> None:
+        """The fast path sums the durations as they are now."""
+        plan = builder.create(name="durations", goal="Goal")
+        step = builder.add_step(plan, "A", dependencies=[], duration=10.0)
+        step.estimated_duration_seconds = 5.0
+        result = builder.validate(plan)
+        assert _build_record(plan) is not None
+        assert result.estimated_total_duration == 5.0
+
+    def test_builder_plan_equals_its_round_trip(self, builder: PlanBuilder) -> None:
+        """The builder keeps nothing on a plan that affects equality."""
+        plan = builder.create(name="round-trip", goal="Goal")
+        step = builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        builder.add_step(plan, "B", dependencies=[step.step_id], duration=1.0)
+        assert plan == Plan.model_validate(plan.model_dump())
+
+    def test_plan_copies_do_not_share_the_build_record(
+        self, builder: PlanBuilder
+    ) -> None:
+        """Growing a copy leaves the original's record intact, and vice versa."""
+        plan = builder.create(name="original", goal="Goal")
+        step = builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        copied = plan.model_copy(update={"steps": list(plan.steps)})
+        builder.add_step(copied, "B", dependencies=[step.step_id], duration=1.0)
+        builder.add_step(plan, "C", dependencies=[step.step_id], duration=1.0)
+        assert _build_record(plan) is not None
+        assert _build_record(copied) is None
+        assert builder.validate(plan).valid is True
+        assert builder.validate(copied).valid is True
+
+    def test_validate_add_step_with_unknown_dependency(
+        self, builder: PlanBuilder
+    ) -> None:
+        """validate() reports unknown dependencies passed through add_step()."""
+        plan = builder.create(name="unknown-dep", goal="Goal")
+        builder.add_step(plan, action="A", dependencies=["nope"], duration=1.0)
+        result = builder.validate(plan)
+        assert result.valid is False
+
     def test_topological_sort_correct_order(
         self, simple_plan: Plan, builder: PlanBuilder
     ) -> None:
@@ -112,36 +261,100 @@ class TestPlanBuilder:
         assert sorted_steps[0].action == "Step A"
         assert sorted_steps[1].action == "Step B"
 
-    def test_topological_sort_raises_on_cycle(self, builder: PlanBuilder) -> None:
+    def test_topological_sort_raises_on_cycle(
+        self, builder: PlanBuilder, step_a_cycle: PlanStep, step_b_cycle: PlanStep
+    ) -> None:
         """topological_sort() raises CircularDependencyError for cyclic plans."""
         plan = builder.create(name="cyclic", goal="Goal")
-        plan.steps.append(PlanStep(step_id="x", action="X", dependencies=["y"]))
-        plan.steps.append(PlanStep(step_id="y", action="Y", dependencies=["x"]))
+        plan.steps.extend([step_a_cycle, step_b_cycle])
         with pytest.raises(CircularDependencyError):
             builder.topological_sort(plan)
 
     def test_save_and_load_plan(
-        self, builder: PlanBuilder, simple_plan: Plan, tmp_path: Path
+        self, builder: PlanBuilder, simple_plan_template: Plan, tmp_path: Path
     ) -> None:
         """save() persists the plan and load() restores it faithfully."""
         file_path = str(tmp_path / "test_plan.yaml")
-        builder.save(simple_plan, file_path)
+        builder.save(simple_plan_template, file_path)
         loaded = builder.load(file_path)
-        assert loaded.name == simple_plan.name
-        assert loaded.goal == simple_plan.goal
-        assert len(loaded.steps) == len(simple_plan.steps)
+        assert loaded.name == simple_plan_template.name
+        assert loaded.goal == simple_plan_template.goal
+        assert len(loaded.steps) == len(simple_plan_template.steps)
+
+    def test_save_and_load_json_plan(
+        self, builder: PlanBuilder, simple_plan_template: Plan, tmp_path: Path
+    ) -> None:
+        """save()/load() use JSON for paths ending in .json."""
+        file_path = tmp_path / "test_plan.json"
+        builder.save(simple_plan_template, str(file_path))
+        assert file_path.read_text(encoding="utf-8").lstrip().startswith("{")
+        loaded = builder.load(str(file_path))
+        assert loaded.plan_id == simple_plan_template.plan_id
+        assert [s.step_id for s in loaded.steps] == [s.step_id for s in simple_plan_template.steps]
 
     def test_load_restores_step_ids(
-        self, builder: PlanBuilder, simple_plan: Plan, tmp_path: Path
+        self, builder: PlanBuilder, simple_plan_template: Plan, tmp_path: Path
     ) -> None:
         """load() restores step_ids correctly."""
-        file_path = str(tmp_path / "restore_test.yaml")
-        original_ids = [s.step_id for s in simple_plan.steps]
-        builder.save(simple_plan, file_path)
+        file_path = str(tmp_path / "restore_test.json")
+        original_ids = [s.step_id for s in simple_plan_template.steps]
+        builder.save(simple_plan_template, file_path)
         loaded = builder.load(file_path)
         loaded_ids = [s.step_id for s in loaded.steps]
         assert original_ids == loaded_ids
 
+    def test_generated_ids_are_unique_url_safe(self, builder: PlanBuilder) -> None:
+        """create() and add_step() issue distinct 22-character URL-safe ids."""
+        plan = builder.create(name="ids", goal="g")
+        steps = [builder.add_step(plan, "s", dependencies=[], duration=1.0) for _ in range(50)]
+        ids = {plan.plan_id, *(step.step_id for step in steps)}
+        assert len(ids) == 51
+        allowed = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+        assert all(len(i) == 22 and set(i) <= allowed for i in ids)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    def test_generated_ids_differ_across_fork(self) -> None:
+        """A forked child does not replay the parent's buffered entropy."""
+        fast_uuid()  # make sure the parent has a partly used buffer
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - child process
+            os.close(read_fd)
+            os.write(write_fd, fast_uuid().encode("ascii"))
+            os._exit(0)
+        os.close(write_fd)
+        parent_id = fast_uuid()
+        with os.fdopen(read_fd, "rb") as reader:
+            child_id = reader.read().decode("ascii")
+        os.waitpid(pid, 0)
+        assert len(child_id) == 22
+        assert child_id != parent_id
+
+    def test_topological_sort_leaves_plan_equality_alone(
+        self, simple_plan: Plan, builder: PlanBuilder
+    ) -> None:
+        """Sorting a plan stores nothing on it that would affect equality."""
+        twin = simple_plan.model_copy(deep=True)
+        builder.topological_sort(simple_plan)
+        assert simple_plan == twin
+
+    def test_topological_sort_sees_direct_edits(
+        self, builder: PlanBuilder
+    ) -> None:
+        """Dependencies edited in place are reflected by the next sort."""
+        plan = builder.create(name="Edit", goal="g")
+        step_a = builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        step_b = builder.add_step(plan, "B", dependencies=[], duration=1.0)
+        assert [s.step_id for s in builder.topological_sort(plan)] == [
+            step_a.step_id,
+            step_b.step_id,
+        ]
+        step_a.dependencies.append(step_b.step_id)
+        assert [s.step_id for s in builder.topological_sort(plan)] == [
+            step_b.step_id,
+            step_a.step_id,
+        ]
+
 
 # ---------------------------------------------------------------------------
 # PlanExecutor tests
@@ -186,8 +399,8 @@ class TestPlanExecutor:
     ) -> None:
         """execute() returns status='failed' for cyclic plans."""
         plan = builder.create(name="cyclic", goal="Goal")
-        plan.steps.append(PlanStep(step_id="x", action="X", dependencies=["y"]))
-        plan.steps.append(PlanStep(step_id="y", action="Y", dependencies=["x"]))
+        plan.steps.append(fast_step(step_id="x", action="X", dependencies=["y"]))
+        plan.steps.append(fast_step(step_id="y", action="Y", dependencies=["x"]))
         result = executor.execute(plan)
         assert result["status"] == "failed"
         assert "error" in result
@@ -200,6 +413,132 @@ class TestPlanExecutor:
         result = executor.execute(plan)
         assert result["steps_completed"] == 0
 
+    def test_execute_runs_wave_steps_concurrently(self, parallel_plan: Plan) -> None:
+        """Steps in the same wave run on separate worker threads at once."""
+        import threading
+
+        barrier = threading.Barrier(2, timeout=5.0)
+        step_b, step_c = parallel_plan.steps[1:]
+
+        class BarrierExecutor(PlanExecutor):
+            def _run_step(self, step: PlanStep) -> dict[str, object]:
+                if step.step_id in (step_b.step_id, step_c.step_id):
+                    barrier.wait()
+                return super()._run_step(step)
+
+        result = BarrierExecutor(max_workers=2).execute(parallel_plan)
+        assert result["status"] == "completed"
+        assert result["steps_completed"] == 3
+
+    @pytest.mark.parametrize("max_workers", [0, -1])
+    def test_max_workers_must_be_positive(self, max_workers: int) -> None:
+        """PlanExecutor() rejects a pool size below 1 instead of defaulting it."""
+        with pytest.raises(ValueError, match="max_workers"):
+            PlanExecutor(max_workers=max_workers)
+
+    def test_execute_runs_lone_steps_inline(
+        self, simple_plan: Plan, parallel_plan: Plan
+    ) -> None:
+        """Single-step waves run on the calling thread; wider waves on the pool."""
+        import threading
+
+        threads: dict[str, int] = {}
+
+        class RecordingExecutor(PlanExecutor):
+            def _run_step(self, step: PlanStep) -> dict[str, object]:
+                threads[step.step_id] = threading.get_ident()
+                return super()._run_step(step)
+
+        executor = RecordingExecutor(max_workers=2)
+        executor.execute(simple_plan)
+        assert set(threads.values()) == {threading.get_ident()}
+        assert executor._pool is None
+
+        threads.clear()
+        executor.execute(parallel_plan)
+        step_a, step_b, step_c = parallel_plan.steps
+        assert threads[step_a.step_id] == threading.get_ident()
+        wave_threads = {threads[step_b.step_id], threads[step_c.step_id]}
+        assert threading.get_ident() not in wave_threads
+
+    def test_execute_reuses_the_thread_pool(self, parallel_plan: Plan) -> None:
+        """The pool is started once, kept across calls and restarted after close()."""
+        executor = PlanExecutor(max_workers=2)
+        executor.execute(parallel_plan)
+        pool = executor._pool
+        assert pool is not None
+        executor.execute(parallel_plan)
+        assert executor._pool is pool
+
+        executor.close()
+        assert executor._pool is None
+        assert executor.execute(parallel_plan)["status"] == "completed"
+        executor.close()
+
+    def test_execute_failed_step_skips_dependents(self, builder: PlanBuilder) -> None:
+        """A raising step is failed and every step downstream of it is skipped."""
+        plan = builder.create(name="failing", goal="Goal")
+        step_a = builder.add_step(plan, action="A", dependencies=[], duration=1.0)
+        step_b = builder.add_step(plan, action="B", dependencies=[step_a.step_id], duration=1.0)
+        builder.add_step(plan, action="C", dependencies=[step_b.step_id], duration=1.0)
+
+        class FailingExecutor(PlanExecutor):
+            def _run_step(self, step: PlanStep) -> dict[str, object]:
+                if step.step_id == step_a.step_id:
+                    raise RuntimeError("handler crashed")
+                return super()._run_step(step)
+
+        result = FailingExecutor().execute(plan)
+        assert result["status"] == "failed"
+        assert result["steps_failed"] == 1
+        assert result["steps_completed"] == 0
+        assert [s["status"] for s in result["steps"]] == ["failed", "skipped", "skipped"]
+        assert result["steps"][0]["error"] == "handler crashed"
+        assert [s.status for s in plan.steps] == ["failed", "skipped", "skipped"]
+
+    async def test_execute_async_completes_all_steps(
+        self, executor: PlanExecutor, parallel_plan: Plan
+    ) -> None:
+        """execute_async() completes every step, wave by wave."""
+        result = await executor.execute_async(parallel_plan)
+        assert result["status"] == "completed"
+        assert result["steps_completed"] == 3
+        assert [s["step_id"] for s in result["steps"]][0] == parallel_plan.steps[0].step_id
+        assert all(step.status == "completed" for step in parallel_plan.steps)
+
+    async def test_execute_async_failed_step_skips_dependents(
+        self, parallel_plan: Plan
+    ) -> None:
+        """A raising step fails alone; its wave finishes and dependents skip."""
+        step_a, step_b, step_c = parallel_plan.steps
+        step_d = fast_step(step_id="d", action="D", dependencies=[step_b.step_id])
+        parallel_plan.steps.append(step_d)
+
+        class FailingExecutor(PlanExecutor):
+            async def _run_step_async(self, step: PlanStep) -> dict[str, object]:
+                if step.step_id == step_b.step_id:
+                    raise RuntimeError("handler crashed")
+                return await super()._run_step_async(step)
+
+        result = await FailingExecutor().execute_async(parallel_plan)
+        assert result["status"] == "failed"
+        assert result["steps_completed"] == 2
+        assert result["steps_failed"] == 1
+        assert step_c.status == "completed"
+        assert step_b.status == "failed"
+        assert step_d.status == "skipped"
+
+    async def test_execute_async_circular_returns_failed(
+        self, executor: PlanExecutor, builder: PlanBuilder
+    ) -> None:
+        """execute_async() returns status='failed' for cyclic plans."""
+        plan = builder.create(name="cyclic", goal="Goal")
+        plan.steps.append(fast_step(step_id="x", action="X", dependencies=["y"]))
+        plan.steps.append(fast_step(step_id="y", action="Y", dependencies=["x"]))
+        result = await executor.execute_async(plan)
+        assert result["status"] == "failed"
+        assert "error" in result
+
     def test_get_ready_steps_no_deps(
         self, executor: PlanExecutor, builder: PlanBuilder
     ) -> None:
@@ -239,10 +578,10 @@ class TestPlanOptimizer:
         assert len(waves[0]) == 1
 
     def test_parallelize_sequential_creates_waves(
-        self, optimizer: PlanOptimizer, simple_plan: Plan
+        self, optimizer: PlanOptimizer, simple_plan_template: Plan
     ) -> None:
         """parallelize() creates one wave per sequential step."""
-        waves = optimizer.parallelize(simple_plan)
+        waves = optimizer.parallelize(simple_plan_template)
         assert len(waves) == 2
 
     def test_parallelize_parallel_steps_in_same_wave(
@@ -278,11 +617,98 @@ class TestPlanOptimizer:
     ) -> None:
         """parallelize() raises CircularDependencyError for cyclic plans."""
         plan = builder.create(name="cyclic", goal="Goal")
-        plan.steps.append(PlanStep(step_id="p", action="P", dependencies=["q"]))
-        plan.steps.append(PlanStep(step_id="q", action="Q", dependencies=["p"]))
+        plan.steps.append(fast_step(step_id="p", action="P", dependencies=["q"]))
+        plan.steps.append(fast_step(step_id="q", action="Q", dependencies=["p"]))
         with pytest.raises(CircularDependencyError):
             optimizer.parallelize(plan)
 
+    def test_parallelize_missing_dependency_counts_as_wave_zero(
+        self, optimizer: PlanOptimizer, builder: PlanBuilder
+    ) -> None:
+        """A missing dependency places its step one wave after wave 0."""
+        plan = builder.create(name="dangling", goal="Goal")
+        plan.steps.append(
+            fast_step(step_id="lone", action="Lone", dependencies=["ghost"])
+        )
+        waves = optimizer.parallelize(plan)
+        assert [[s.step_id for s in w] for w in waves] == [[], ["lone"]]
+
+        plan.steps[:0] = [fast_step(step_id="root", action="Root")]
+        plan.steps.append(
+            fast_step(step_id="after", action="After", dependencies=["root"])
+        )
+        waves = optimizer.parallelize(plan)
+        assert [[s.step_id for s in w] for w in waves] == [
+            ["root"],
+            ["lone", "after"],
+        ]
+
+    def test_analyze_missing_dependency_waves(
+        self, optimizer: PlanOptimizer, builder: PlanBuilder
+    ) -> None:
+        """analyze() keeps the empty wave in front of a dangling-only step."""
+        plan = builder.create(name="dangling", goal="Goal")
+        plan.steps.append(
+            fast_step(
+                step_id="lone",
+                action="Lone",
+                dependencies=["ghost"],
+                estimated_duration_seconds=4.0,
+            )
+        )
+        analysis = optimizer.analyze(plan)
+        assert [[s.step_id for s in w] for w in analysis.waves] == [[], ["lone"]]
+        assert analysis.wave_durations == [0.0, 4.0]
+        assert analysis.critical_path == ["lone"]
+        assert analysis.critical_path_duration == 4.0
+
+    def test_analyze_waves_match_parallelize(
+        self, optimizer: PlanOptimizer, parallel_plan: Plan
+    ) -> None:
+        """analyze() produces the same waves as parallelize()."""
+        analysis = optimizer.analyze(parallel_plan)
+        expected = optimizer.parallelize(parallel_plan)
+        assert [[s.step_id for s in w] for w in analysis.waves] == [
+            [s.step_id for s in w] for w in expected
+        ]
+
+    def test_analyze_critical_path(
+        self, optimizer: PlanOptimizer, parallel_plan: Plan
+    ) -> None:
+        """analyze() follows the longest branch and sums its duration."""
+        analysis = optimizer.analyze(parallel_plan)
+        step_a, step_b, _ = parallel_plan.steps
+        assert analysis.critical_path == [step_a.step_id, step_b.step_id]
+        assert analysis.critical_path_duration == 15.0
+
+    def test_analyze_wave_durations(
+        self, optimizer: PlanOptimizer, parallel_plan: Plan
+    ) -> None:
+        """analyze() records the longest step duration of each wave."""
+        analysis = optimizer.analyze(parallel_plan)
+        assert analysis.wave_durations == [5.0, 10.0]
+
+    def test_analyze_empty_plan(
+        self, optimizer: PlanOptimizer, builder: PlanBuilder
+    ) -> None:
+        """analyze() returns an empty analysis for an empty plan."""
+        plan = builder.create(name="empty", goal="Goal")
+        analysis = optimizer.analyze(plan)
+        assert analysis.waves == []
+        assert analysis.wave_durations == []
+        assert analysis.critical_path == []
+        assert analysis.critical_path_duration == 0.0
+
+    def test_analyze_raises_on_circular(
+        self, optimizer: PlanOptimizer, builder: PlanBuilder
+    ) -> None:
+        """analyze() raises CircularDependencyError for cyclic plans."""
+        plan = builder.create(name="cyclic", goal="Goal")
+        plan.steps.append(fast_step(step_id="p", action="P", dependencies=["q"]))
+        plan.steps.append(fast_step(step_id="q", action="Q", dependencies=["p"]))
+        with pytest.raises(CircularDependencyError):
+            optimizer.analyze(plan)
+
 
 # ---------------------------------------------------------------------------
 # DependencyResolver tests
@@ -292,72 +718,177 @@ class TestPlanOptimizer:
 class TestDependencyResolver:
     """Tests for DependencyResolver."""
 
-    def test_topological_sort_two_steps(self) -> None:
+    def test_topological_sort_two_steps(
+        self, step_a_no_deps: PlanStep, step_b_dep_a: PlanStep
+    ) -> None:
         """topological_sort() returns steps in dependency order."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=[], estimated_duration_seconds=5.0)
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"], estimated_duration_seconds=10.0)
-        resolver = DependencyResolver([step_a, step_b])
+        resolver = DependencyResolver([step_a_no_deps, step_b_dep_a])
         sorted_steps = resolver.topological_sort()
         assert sorted_steps[0].step_id == "a"
         assert sorted_steps[1].step_id == "b"
 
-    def test_topological_sort_raises_on_cycle(self) -> None:
+    def test_topological_sort_raises_on_cycle(
+        self, cyclic_resolver: DependencyResolver
+    ) -> None:
         """topological_sort() raises CircularDependencyError for cyclic steps."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=["b"])
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"])
-        resolver = DependencyResolver([step_a, step_b])
         with pytest.raises(CircularDependencyError):
-            resolver.topological_sort()
-
-    def test_detect_cycles_no_cycles(self) -> None:
+            cyclic_resolver.topological_sort()
+
+    def test_step_dependencies_are_deduplicated(self, builder: PlanBuilder) -> None:
+        """Repeated dependency ids collapse to one, in first-seen order."""
+        step = PlanStep(step_id="s", action="S", dependencies=["b", "a", "b", "a"])
+        assert step.dependencies == ["b", "a"]
+        plan = builder.create(name="dupes", goal="g")
+        first = builder.add_step(plan, "A", dependencies=[], duration=1.0)
+        second = builder.add_step(
+            plan, "B", dependencies=[first.step_id, first.step_id], duration=1.0
+        )
+        assert second.dependencies == [first.step_id]
+
+    def test_compiled_steps_adjacency(self) -> None:
+        """Each step lists its dependencies and its ascending dependents."""
+        steps = [
+            fast_step(step_id="a", action="A"),
+            fast_step(step_id="b", action="B", dependencies=["a"]),
+            fast_step(step_id="c", action="C", dependencies=["a", "b"]),
+            fast_step(step_id="d", action="D", dependencies=["a", "ghost"]),
+        ]
+        graph = CompiledSteps(steps)
+        assert graph.preds == [[], [0], [0, 1], [0]]
+        assert graph.succs == [[1, 2, 3], [2], [], []]
+        assert graph.dangling == [(3, "ghost")]
+
+    def test_chain_shaped_steps_are_detected(
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal, parallel_plan: Plan
+    ) -> None:
+        """Generated plans take the chain fast path; branching plans do not."""
+        plan = gen.generate([goal_a, goal_b])
+        graph = CompiledSteps(plan.steps)
+        assert graph.is_chain
+        assert graph.kahn_order() == list(range(len(plan.steps)))
+        assert graph.kahn_levels()[1] == list(range(len(plan.steps)))
+        assert not CompiledSteps(parallel_plan.steps).is_chain
+
+    def test_chain_must_start_without_missing_dependencies(self) -> None:
+        """A first step with a missing dependency sits in level 1, not 0."""
+        steps = [
+            fast_step(step_id="a", action="A", dependencies=["ghost"]),
+            fast_step(step_id="b", action="B", dependencies=["a"]),
+        ]
+        graph = CompiledSteps(steps)
+        assert not graph.is_chain
+        assert graph.kahn_levels() == ([0, 1], [1, 2])
+
+    def test_kahn_sort_reports_unsorted_positions(self) -> None:
+        """kahn_sort() returns positions, ids and the steps stuck on a cycle."""
+        steps = [
+            fast_step(step_id="a", action="A", dependencies=["b"]),
+            fast_step(step_id="b", action="B", dependencies=["a", "a"]),
+            fast_step(step_id="c", action="C", dependencies=["ghost"]),
+        ]
+        order, step_ids, unsorted = kahn_sort(steps)
+        assert order == [2]
+        assert step_ids == ["a", "b", "c"]
+        assert unsorted == [0, 1]
+
+    def test_detect_cycles_no_cycles(
+        self, step_a_no_deps: PlanStep, step_b_dep_a: PlanStep
+    ) -> None:
         """detect_cycles() returns empty list when no cycles exist."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=[])
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"])
-        resolver = DependencyResolver([step_a, step_b])
+        resolver = DependencyResolver([step_a_no_deps, step_b_dep_a])
         cycles = resolver.detect_cycles()
         assert cycles == []
 
-    def test_detect_cycles_finds_cycle(self) -> None:
+    def test_detect_cycles_finds_cycle(
+        self, cyclic_resolver: DependencyResolver
+    ) -> None:
         """detect_cycles() returns a non-empty list when a cycle exists."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=["b"])
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"])
-        resolver = DependencyResolver([step_a, step_b])
-        cycles = resolver.detect_cycles()
+        cycles = cyclic_resolver.detect_cycles()
         assert len(cycles) > 0
 
-    def test_critical_path_simple(self) -> None:
-        """critical_path() returns the path through the longest-duration steps."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=[], estimated_duration_seconds=5.0)
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"], estimated_duration_seconds=10.0)
+    def test_detect_cycles_one_canonical_cycle_per_component(self) -> None:
+        """Each cycle is reported once, starting at its smallest step_id."""
+        steps = [
+            fast_step(step_id="c", action="C", dependencies=["a"]),
+            fast_step(step_id="a", action="A", dependencies=["b"]),
+            fast_step(step_id="b", action="B", dependencies=["c", "a"]),
+            fast_step(step_id="d", action="D", dependencies=["d"]),
+        ]
+        cycles = DependencyResolver(steps).detect_cycles()
+        assert cycles == [["a", "b", "a"], ["d", "d"]]
+
+    def test_detect_cycles_is_cached(
+        self, step_a_cycle: PlanStep, step_b_cycle: PlanStep
+    ) -> None:
+        """Repeated calls reuse the first result and hand out fresh lists."""
+        resolver = DependencyResolver([step_a_cycle, step_b_cycle])
+        first = resolver.detect_cycles()
+        first[0].append("mutated")
+        assert resolver.detect_cycles() == [["a", "b", "a"]]
+        assert resolver._cycles_cache == [["a", "b", "a"]]
+
+    def test_detect_cycles_skips_pass_after_successful_sort(self) -> None:
+        """A resolver that already sorted every step reports no cycles."""
+        step_a = fast_step(step_id="a", action="A")
+        step_b = fast_step(step_id="b", action="B")
         resolver = DependencyResolver([step_a, step_b])
+        resolver.topological_sort()
+        assert resolver.detect_cycles() == []
+
+    def test_detect_cycles_deep_chain_does_not_recurse(self) -> None:
+        """A cycle longer than the recursion limit is still found."""
+        count = 5000
+        steps = [
+            fast_step(step_id=f"s{i:04d}", action="x", dependencies=[f"s{(i + 1) % count:04d}"])
+            for i in range(count)
+        ]
+        cycles = DependencyResolver(steps).detect_cycles()
+        assert len(cycles) == 1
+        assert len(cycles[0]) == count + 1
+        assert cycles[0][0] == cycles[0][-1] == "s0000"
+
+    def test_critical_path_simple(
+        self, step_a_no_deps: PlanStep, step_b_dep_a: PlanStep
+    ) -> None:
+        """critical_path() returns the path through the longest-duration steps."""
+        resolver = DependencyResolver([step_a_no_deps, step_b_dep_a])
         path = resolver.critical_path()
         assert "a" in path
         assert "b" in path
 
     def test_critical_path_selects_longest_branch(self) -> None:
         """critical_path() selects the branch with the longest total duration."""
-        start = PlanStep(step_id="s", action="S", dependencies=[], estimated_duration_seconds=1.0)
-        short = PlanStep(step_id="short", action="Short", dependencies=["s"], estimated_duration_seconds=2.0)
-        long_ = PlanStep(step_id="long", action="Long", dependencies=["s"], estimated_duration_seconds=20.0)
+        start = fast_step(step_id="s", action="S", dependencies=[], estimated_duration_seconds=1.0)
+        short = fast_step(step_id="short", action="Short", dependencies=["s"], estimated_duration_seconds=2.0)
+        long_ = fast_step(step_id="long", action="Long", dependencies=["s"], estimated_duration_seconds=20.0)
         resolver = DependencyResolver([start, short, long_])
         path = resolver.critical_path()
         assert "long" in path
         assert "short" not in path
 
-    def test_total_duration_seconds(self) -> None:
+    def test_total_duration_seconds(
+        self, step_a_no_deps: PlanStep, step_b_dep_a: PlanStep
+    ) -> None:
         """total_duration_seconds() returns sum of critical path durations."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=[], estimated_duration_seconds=5.0)
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"], estimated_duration_seconds=10.0)
-        resolver = DependencyResolver([step_a, step_b])
+        resolver = DependencyResolver([step_a_no_deps, step_b_dep_a])
         total = resolver.total_duration_seconds()
         assert total == 15.0
 
-    def test_total_duration_circular_returns_zero(self) -> None:
+    def test_resolver_reuse_is_consistent(
+        self, step_a_no_deps: PlanStep, step_b_dep_a: PlanStep
+    ) -> None:
+        """Repeated calls on one resolver return the same order and path."""
+        resolver = DependencyResolver([step_a_no_deps, step_b_dep_a])
+        first = [s.step_id for s in resolver.topological_sort()]
+        assert [s.step_id for s in resolver.topological_sort()] == first
+        assert resolver.critical_path() == ["a", "b"]
+        assert resolver.total_duration_seconds() == 15.0
+
+    def test_total_duration_circular_returns_zero(
+        self, cyclic_resolver: DependencyResolver
+    ) -> None:
         """total_duration_seconds() returns 0.0 when cycle prevents computation."""
-        step_a = PlanStep(step_id="a", action="A", dependencies=["b"])
-        step_b = PlanStep(step_id="b", action="B", dependencies=["a"])
-        resolver = DependencyResolver([step_a, step_b])
-        assert resolver.total_duration_seconds() == 0.0
+        assert cyclic_resolver.total_duration_seconds() == 0.0
 
 
 # ---------------------------------------------------------------------------
@@ -368,75 +899,115 @@ class TestDependencyResolver:
 class TestPlanGenerator:
     """Tests for PlanGenerator."""
 
-    def test_generate_single_goal(self, goal_a: Goal) -> None:
+    def test_generated_steps_match_validated_steps(
+        self, gen: PlanGenerator, goal_a: Goal
+    ) -> None:
+        """Trusted construction yields steps equal to fully validated ones."""
+        plan = gen.generate([goal_a])
+        for step in plan.steps:
+            assert PlanStep.model_validate(step.model_dump()) == step
+
+    def test_generate_duration_matches_critical_path(
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal
+    ) -> None:
+        """The analytic duration equals the critical path of the generated steps."""
+        plan = gen.generate([goal_a, goal_b])
+        resolver = DependencyResolver(plan.steps)
+        assert plan.estimated_duration_seconds == resolver.total_duration_seconds()
+        assert resolver.critical_path() == [s.step_id for s in plan.steps]
+
+    def test_generate_single_goal(self, gen: PlanGenerator, goal_a: Goal) -> None:
         """generate() creates a plan for a single goal."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a])
         assert isinstance(plan, Plan)
         assert plan.plan_id != ""
         assert len(plan.steps) == 3  # gather / act / verify
 
-    def test_generate_two_goals(self, goal_a: Goal, goal_b: Goal) -> None:
+    def test_generate_two_goals(
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal
+    ) -> None:
         """generate() creates steps for each goal."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a, goal_b])
         assert len(plan.steps) == 6  # 3 steps per goal
 
-    def test_generate_custom_plan_name(self, goal_a: Goal) -> None:
+    def test_generate_custom_plan_name(self, gen: PlanGenerator, goal_a: Goal) -> None:
         """generate() uses the provided plan_name."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a], plan_name="Custom Plan Name")
         assert plan.name == "Custom Plan Name"
 
     def test_generate_default_plan_name_uses_first_goal(
-        self, goal_a: Goal
+        self, gen: PlanGenerator, goal_a: Goal
     ) -> None:
         """generate() uses the first goal description as plan name when none provided."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a])
         assert "Set up infrastructure" in plan.name
 
-    def test_generate_raises_for_empty_goals(self) -> None:
+    def test_generate_raises_for_empty_goals(self, gen: PlanGenerator) -> None:
         """generate() raises ValueError for empty goals list."""
-        gen = PlanGenerator()
         with pytest.raises(ValueError, match="At least one goal"):
             gen.generate([])
 
+    def test_goals_are_frozen(self, goal_a: Goal) -> None:
+        """Goal instances are immutable value objects."""
+        with pytest.raises(ValidationError):
+            goal_a.priority = 1  # type: ignore[misc]
+        assert goal_a.model_copy(update={"priority": 1}).priority == 1
+
     def test_generate_goals_sorted_by_priority(
-        self, goal_a: Goal, goal_b: Goal
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal
     ) -> None:
         """generate() sorts goals by priority (highest first)."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_b, goal_a])  # goal_a has higher priority
         assert plan.goals[0].goal_id == "goal-a"
 
     def test_generate_includes_goals_in_plan(
-        self, goal_a: Goal, goal_b: Goal
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal
     ) -> None:
         """generate() stores the sorted goals on the plan."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a, goal_b])
         goal_ids = [g.goal_id for g in plan.goals]
         assert "goal-a" in goal_ids
         assert "goal-b" in goal_ids
 
     def test_generate_step_descriptions_reference_goal(
-        self, goal_a: Goal
+        self, gen: PlanGenerator, goal_a: Goal
     ) -> None:
         """generate() step actions reference the goal description."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a])
         actions = [s.action for s in plan.steps]
         assert any("Set up infrastructure" in a for a in actions)
 
-    def test_generate_has_cost_estimate(self, goal_a: Goal) -> None:
+    def test_generate_has_cost_estimate(self, gen: PlanGenerator, goal_a: Goal) -> None:
         """generate() sets a non-negative cost estimate."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a])
         assert plan.estimated_cost >= 0.0
 
-    def test_generate_has_duration_estimate(self, goal_a: Goal) -> None:
+    def test_generate_has_duration_estimate(
+        self, gen: PlanGenerator, goal_a: Goal
+    ) -> None:
         """generate() sets a positive duration estimate."""
-        gen = PlanGenerator()
         plan = gen.generate([goal_a])
         assert plan.estimated_duration_seconds > 0.0
+
+    def test_generate_repeat_returns_independent_plans(
+        self, gen: PlanGenerator, goal_a: Goal
+    ) -> None:
+        """generate() memoizes decomposition but never shares mutable state."""
+        first = gen.generate([goal_a])
+        first.steps[0].status = "completed"
+        first.steps[1].dependencies.append("extra")
+        second = gen.generate([goal_a])
+        assert second.plan_id != first.plan_id
+        assert [s.step_id for s in second.steps] == [s.step_id for s in first.steps]
+        assert second.steps[0].status == "pending"
+        assert second.steps[1].dependencies == ["g0_gather"]
+        assert second.estimated_duration_seconds == first.estimated_duration_seconds
+
+    def test_generate_without_cache(
+        self, gen: PlanGenerator, goal_a: Goal, goal_b: Goal
+    ) -> None:
+        """generate() works identically with caching disabled."""
+        cached = gen.generate([goal_a, goal_b])
+        uncached = PlanGenerator(cache_size=0).generate([goal_a, goal_b])
+        assert [s.step_id for s in uncached.steps] == [s.step_id for s in cached.steps]
+        assert uncached.estimated_duration_seconds == cached.estimated_duration_seconds